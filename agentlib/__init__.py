@@ -0,0 +1,6 @@
+"""
+Reusable building blocks shared by the demos in this repository.
+
+Scripts in the repository root can import it directly. Scripts in the day
+folders and in telegram/ add the repository root to sys.path first.
+"""
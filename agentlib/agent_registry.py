@@ -0,0 +1,137 @@
+"""
+Interned agent definitions.
+
+Building an Agent is cheap, but running one isn't free: for every run the SDK
+turns a plain output_type (like list[BlogPostIdea]) into a new
+AgentOutputSchema, which means generating and validating a JSON schema with
+pydantic. AgentRegistry hands out one shared Agent per definition, keyed by a
+hash of name, instructions, model, tools, output type and any other Agent
+arguments, and gives it a prebuilt AgentOutputSchema that is shared by every
+agent with the same output type. Function tools keep the JSON schema built
+when they were decorated, so reusing the tool objects reuses their schemas.
+
+The registry is an LRU with a size limit, see stats().
+
+    agent = get_agent("Assistant", instructions=request.agent_instructions)
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from agents import Agent, AgentOutputSchema
+from agents.agent_output import AgentOutputSchemaBase
+
+
+def _identity(value: Any) -> Any:
+    """A JSON-able stand-in for an Agent argument, equal for equal definitions"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_identity(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _identity(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, type) or hasattr(value, "__origin__"):
+        # Classes and generic aliases like list[BlogPostIdea]
+        return f"type:{getattr(value, '__module__', '')}:{value!r}"
+    # Models, tools, callables, settings objects: the same object means the same definition
+    return f"{type(value).__qualname__}@{id(value):x}"
+
+
+def definition_key(**definition: Any) -> str:
+    payload = json.dumps(_identity(definition), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AgentRegistry:
+    def __init__(self, max_agents: int = 256):
+        self.max_agents = max_agents
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.schemas_built = 0
+        self._agents: OrderedDict[str, Agent] = OrderedDict()
+        self._schemas: dict[tuple, AgentOutputSchemaBase] = {}
+        # Arguments of interned agents, kept alive so their ids in the keys stay unique
+        self._definitions: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def output_schema(self, output_type: Any, strict_json_schema: bool = True) -> Any:
+        """A shared AgentOutputSchema for output_type (str and None pass through)"""
+        if output_type is None or output_type is str or isinstance(output_type, AgentOutputSchemaBase):
+            return output_type
+        key = (output_type, strict_json_schema)
+        with self._lock:
+            schema = self._schemas.get(key)
+        if schema is None:
+            built = AgentOutputSchema(output_type, strict_json_schema=strict_json_schema)
+            with self._lock:
+                schema = self._schemas.setdefault(key, built)
+                if schema is built:
+                    self.schemas_built += 1
+        return schema
+
+    def get(
+        self,
+        name: str,
+        instructions: Any = None,
+        model: Any = None,
+        tools: Optional[list] = None,
+        output_type: Any = None,
+        **kwargs: Any,
+    ) -> Agent:
+        """The shared Agent for this definition, built on first use"""
+        definition = dict(name=name, instructions=instructions, model=model, tools=tools or [], output_type=output_type, **kwargs)
+        key = definition_key(**definition)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                self.hits += 1
+                return agent
+
+        agent = Agent(
+            name=name,
+            instructions=instructions,
+            model=model,
+            tools=list(tools or []),
+            output_type=self.output_schema(output_type),
+            **kwargs,
+        )
+        with self._lock:
+            self.misses += 1
+            agent = self._agents.setdefault(key, agent)
+            self._definitions[key] = definition
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_agents:
+                evicted, _ = self._agents.popitem(last=False)
+                self._definitions.pop(evicted, None)
+                self.evictions += 1
+        return agent
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "agents": len(self._agents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "schemas": len(self._schemas),
+            "schemas_built": self.schemas_built,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._agents.clear()
+            self._definitions.clear()
+            self._schemas.clear()
+
+
+registry = AgentRegistry()
+
+
+def get_agent(name: str, **kwargs: Any) -> Agent:
+    return registry.get(name, **kwargs)
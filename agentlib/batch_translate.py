@@ -0,0 +1,212 @@
+"""
+Translating many strings with few model calls.
+
+One Runner.run per string is slow and pays for the instructions every time.
+translate_many() instead
+
+- drops duplicates and strings already in the store
+- packs the rest into numbered batches, bounded by item count and tokens
+- asks a copy of the translator agent for a structured list of translations,
+  a few batches at a time
+- saves every batch to a local SQLite store as soon as it comes back
+
+A crashed or interrupted job resumes where it stopped: run it again and only
+the strings missing from the store are sent. Strings the model skipped or
+mangled are retried in a smaller batch, then reported as missing.
+
+    store = TranslationStore("translations.db")
+    translations = await translate_many(french_agent, strings, store, language="fr")
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from agents import Agent, Runner
+from pydantic import BaseModel
+
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+BATCH_INSTRUCTIONS = """
+You get a JSON list of {"id": ..., "text": ...} objects. Translate every text
+and answer with one entry per id. Keep placeholders like {name} or %s, markup
+and surrounding whitespace exactly as they are. Never merge or skip entries.
+"""
+
+
+class Translated(BaseModel):
+    id: int
+    text: str
+
+
+class TranslatedBatch(BaseModel):
+    translations: list[Translated]
+
+
+class TranslationStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    language TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (language, source)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get_many(self, language: str, sources: list[str]) -> dict[str, str]:
+        conn = self._connect()
+        found = {}
+        # Stay below SQLite's limit on bound parameters
+        for i in range(0, len(sources), 500):
+            chunk = sources[i:i + 500]
+            rows = conn.execute(
+                f"SELECT source, translation FROM translations WHERE language = ? AND source IN ({','.join('?' * len(chunk))})",
+                [language, *chunk],
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, language: str, translations: dict[str, str]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (language, source, translation, created_at) VALUES (?, ?, ?, ?)",
+                [(language, source, translation, now) for source, translation in translations.items()],
+            )
+
+
+@dataclass
+class BatchStats:
+    requested: int = 0
+    unique: int = 0
+    cached: int = 0
+    translated: int = 0
+    batches: int = 0
+    retried: int = 0
+    missing: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requested} strings, {self.unique} unique, {self.cached} from the store, "
+            f"{self.translated} translated in {self.batches} batches ({self.retried} retried), "
+            f"{len(self.missing)} missing"
+        )
+
+
+def pack(strings: list[str], max_items: int, max_tokens: int) -> list[list[str]]:
+    """Split strings into batches of at most max_items strings and about max_tokens tokens"""
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    tokens = 0
+    for text in strings:
+        size = count_tokens(text) + 8  # the {"id": n, "text": ...} wrapper
+        if batch and (len(batch) >= max_items or tokens + size > max_tokens):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(text)
+        tokens += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_agent(agent: Agent) -> Agent:
+    """A copy of a translator agent that answers with a TranslatedBatch"""
+    instructions = agent.instructions
+    if isinstance(instructions, str) or instructions is None:
+        instructions = f"{instructions or ''}\n{BATCH_INSTRUCTIONS}"
+    return agent.clone(name=f"{agent.name} (batch)", instructions=instructions, output_type=TranslatedBatch)
+
+
+async def _translate_batch(agent: Agent, batch: list[str]) -> dict[str, str]:
+    payload = json.dumps([{"id": i, "text": text} for i, text in enumerate(batch)], ensure_ascii=False)
+    result = await Runner.run(agent, payload)
+    translated = {}
+    for item in result.final_output.translations:
+        if 0 <= item.id < len(batch) and item.text.strip():
+            translated[batch[item.id]] = item.text
+    return translated
+
+
+async def translate_many(
+    agent: Agent,
+    strings: Iterable[str],
+    store: TranslationStore,
+    language: Optional[str] = None,
+    max_items: int = 40,
+    max_tokens: int = 2000,
+    concurrency: int = 4,
+    stats: Optional[BatchStats] = None,
+) -> dict[str, str]:
+    """
+    Translations of strings, keyed by the original string. Strings that
+    couldn't be translated are left out and listed in stats.missing.
+
+    :param language: key for the store, the agent name by default
+    """
+    language = language or agent.name
+    stats = stats if stats is not None else BatchStats()
+    strings = list(strings)
+    unique = list(dict.fromkeys(strings))
+    stats.requested += len(strings)
+    stats.unique += len(unique)
+
+    translations = store.get_many(language, unique)
+    stats.cached += len(translations)
+    todo = [text for text in unique if text not in translations and text.strip()]
+    for text in unique:
+        # Nothing to translate in blank strings
+        if not text.strip():
+            translations[text] = text
+
+    worker = batch_agent(agent)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(batch: list[str]) -> dict[str, str]:
+        async with semaphore:
+            stats.batches += 1
+            try:
+                done = await _translate_batch(worker, batch)
+            except Exception as e:
+                logger.warning("Batch of %d strings failed: %s", len(batch), e)
+                return {}
+            store.put_many(language, done)
+            return done
+
+    for attempt in range(2):
+        if not todo:
+            break
+        # Retries go in small batches, a long batch is more likely to lose entries
+        limit = max_items if attempt == 0 else max(1, max_items // 4)
+        results = await asyncio.gather(*(run(batch) for batch in pack(todo, limit, max_tokens)))
+        for done in results:
+            translations.update(done)
+            stats.translated += len(done)
+        todo = [text for text in todo if text not in translations]
+        if attempt == 0:
+            stats.retried += len(todo)
+
+    stats.missing.extend(todo)
+    return translations
@@ -0,0 +1,233 @@
+"""
+Latency benchmark for several models.
+
+Runs every prompt against every model (optionally several times) with a cap
+on how many requests are in flight, and records for each request:
+
+- time to first token
+- total latency
+- output tokens per second
+- token usage
+- errors
+
+summarize() turns the samples into per-model percentiles, and write_report()
+writes them as JSON or CSV.
+
+Backends produce the text deltas and usage for one request. AgentBackend
+goes through Runner.run_streamed; MockBackend fakes latency and tokens, so the
+harness can be exercised without network or API keys.
+"""
+
+import asyncio
+import csv
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Optional, Protocol
+
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, Runner
+
+from .models import get_model
+
+
+@dataclass
+class Usage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+@dataclass
+class Sample:
+    model: str
+    prompt: int
+    ttft: Optional[float] = None
+    latency: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if not self.output_tokens or self.latency is None:
+            return None
+        generation = self.latency - (self.ttft or 0)
+        return self.output_tokens / generation if generation > 0 else None
+
+
+class Backend(Protocol):
+    def stream(self, model: str, prompt: str, usage: Usage) -> AsyncIterator[str]:
+        """Yield text deltas, and fill usage when done"""
+
+
+class AgentBackend:
+    def __init__(self, instructions: str = "You are a helpful assistant.", api_key: Optional[str] = None):
+        self.instructions = instructions
+        self.api_key = api_key
+
+    async def stream(self, model: str, prompt: str, usage: Usage) -> AsyncIterator[str]:
+        agent = Agent(name="Benchmark", model=get_model(model, api_key=self.api_key), instructions=self.instructions)
+        result = Runner.run_streamed(agent, prompt)
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                yield event.data.delta
+        run_usage = result.context_wrapper.usage
+        usage.input_tokens = run_usage.input_tokens
+        usage.output_tokens = run_usage.output_tokens
+
+
+class MockBackend:
+    """Pretends to be a model: ttft seconds until the first token, then tokens_per_second"""
+
+    def __init__(self, ttft: float = 0.2, tokens_per_second: float = 200, tokens: int = 50, error_rate: float = 0.0, seed: int = 0):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    async def stream(self, model: str, prompt: str, usage: Usage) -> AsyncIterator[str]:
+        jitter = self._random.uniform(0.8, 1.2)
+        await asyncio.sleep(self.ttft * jitter)
+        if self._random.random() < self.error_rate:
+            raise RuntimeError(f"mock error from {model}")
+        for i in range(self.tokens):
+            if i:
+                await asyncio.sleep(jitter / self.tokens_per_second)
+            yield "tok "
+        usage.input_tokens = len(prompt) // 4 + 1
+        usage.output_tokens = self.tokens
+
+
+async def measure(backend: Backend, model: str, prompt_index: int, prompt: str, timeout: Optional[float]) -> Sample:
+    sample = Sample(model=model, prompt=prompt_index)
+    usage = Usage()
+    start = time.perf_counter()
+
+    async def consume():
+        async for delta in backend.stream(model, prompt, usage):
+            if sample.ttft is None and delta:
+                sample.ttft = time.perf_counter() - start
+
+    try:
+        await asyncio.wait_for(consume(), timeout)
+        sample.latency = time.perf_counter() - start
+        sample.input_tokens = usage.input_tokens
+        sample.output_tokens = usage.output_tokens
+    except Exception as e:
+        sample.error = f"{type(e).__name__}: {e}"
+    return sample
+
+
+async def run_benchmark(
+    backend: Backend,
+    models: list[str],
+    prompts: list[str],
+    repeats: int = 1,
+    concurrency: int = 4,
+    timeout: Optional[float] = 120,
+) -> list[Sample]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(model: str, index: int, prompt: str) -> Sample:
+        async with semaphore:
+            return await measure(backend, model, index, prompt, timeout)
+
+    jobs = [
+        bounded(model, index, prompt)
+        for _ in range(repeats)
+        for model in models
+        for index, prompt in enumerate(prompts)
+    ]
+    return await asyncio.gather(*jobs)
+
+
+def percentile(values: list[float], p: float) -> Optional[float]:
+    """Linear interpolation between the closest ranks, p in [0, 100]"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+@dataclass
+class ModelStats:
+    model: str
+    requests: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency: dict = field(default_factory=dict)
+    ttft: dict = field(default_factory=dict)
+    tokens_per_second: dict = field(default_factory=dict)
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def _distribution(values: list[float]) -> dict:
+    return {f"p{p}": percentile(values, p) for p in PERCENTILES}
+
+
+def summarize(samples: list[Sample]) -> list[ModelStats]:
+    by_model: dict[str, list[Sample]] = {}
+    for sample in samples:
+        by_model.setdefault(sample.model, []).append(sample)
+
+    stats = []
+    for model, model_samples in by_model.items():
+        ok = [s for s in model_samples if s.error is None]
+        stats.append(ModelStats(
+            model=model,
+            requests=len(model_samples),
+            errors=len(model_samples) - len(ok),
+            input_tokens=sum(s.input_tokens for s in ok),
+            output_tokens=sum(s.output_tokens for s in ok),
+            latency=_distribution([s.latency for s in ok]),
+            ttft=_distribution([s.ttft for s in ok if s.ttft is not None]),
+            tokens_per_second=_distribution([s.tokens_per_second for s in ok if s.tokens_per_second]),
+        ))
+    return sorted(stats, key=lambda s: s.latency.get("p50") or float("inf"))
+
+
+def write_report(stats: list[ModelStats], samples: list[Sample], path: str):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf8") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["model", "requests", "errors", "input_tokens", "output_tokens"]
+                + [f"{metric}_p{p}" for metric in ("latency", "ttft", "tokens_per_second") for p in PERCENTILES]
+            )
+            for s in stats:
+                writer.writerow(
+                    [s.model, s.requests, s.errors, s.input_tokens, s.output_tokens]
+                    + [getattr(s, metric).get(f"p{p}") for metric in ("latency", "ttft", "tokens_per_second") for p in PERCENTILES]
+                )
+        return
+
+    with open(path, "w", encoding="utf8") as f:
+        json.dump(
+            {
+                "models": [asdict(s) for s in stats],
+                "samples": [dict(asdict(s), tokens_per_second=s.tokens_per_second) for s in samples],
+            },
+            f,
+            indent=2,
+        )
+
+
+def print_table(stats: list[ModelStats]):
+    def fmt(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f}"
+
+    print(f"{'model':45} {'ok/total':>9} {'ttft p50':>9} {'lat p50':>8} {'lat p90':>8} {'lat p99':>8} {'tok/s p50':>9}")
+    for s in stats:
+        print(
+            f"{s.model:45} {s.requests - s.errors:>4}/{s.requests:<4} {fmt(s.ttft['p50']):>9} "
+            f"{fmt(s.latency['p50']):>8} {fmt(s.latency['p90']):>8} {fmt(s.latency['p99']):>8} "
+            f"{fmt(s.tokens_per_second['p50']):>9}"
+        )
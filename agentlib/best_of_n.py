@@ -0,0 +1,196 @@
+"""
+Best-of-N sampling.
+
+Runs the same agent N times (at most `concurrency` at a time, each with an
+optional timeout) and picks one output. Sampling stops early, and the runs
+still in flight are cancelled, when:
+
+- `quorum` samples agree with each other (text similarity >= `agreement`), or
+- a sample scores at least `threshold` with the `score` function
+
+Failed samples (errors, timeouts) are logged and skipped; if every sample
+fails, best_of_n raises. When a quorum is reached, or all the samples agree, the picker is skipped and
+the most central of the agreeing samples is returned. Otherwise the picker
+chooses:
+
+- LLMPicker: asks an agent to choose (what day 19 does)
+- MajorityPicker: local, picks the sample most similar to all the others
+- ScorePicker: local, picks the highest scoring sample
+
+    result = await best_of_n(agent, msg, n=5, quorum=3, picker=LLMPicker(picker_agent))
+    print(result.best)
+"""
+
+import asyncio
+import inspect
+import logging
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Awaitable, Callable, Optional, Protocol, Union
+
+from pydantic import BaseModel, Field
+from agents import Agent, Runner
+
+logger = logging.getLogger(__name__)
+
+Score = Callable[[str], Union[float, Awaitable[float]]]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, _normalize(a), _normalize(b), autojunk=False).ratio()
+
+
+def medoid(outputs: list[str]) -> int:
+    """Index of the output with the highest total similarity to the others"""
+    if len(outputs) <= 2:
+        return 0
+    totals = [sum(similarity(a, b) for j, b in enumerate(outputs) if i != j) for i, a in enumerate(outputs)]
+    return max(range(len(outputs)), key=totals.__getitem__)
+
+
+def agreeing_group(outputs: list[str], quorum: int, agreement: float) -> Optional[list[int]]:
+    """Indexes of `quorum` outputs that are all similar to one of them, if there are that many"""
+    for i, a in enumerate(outputs):
+        group = [i] + [j for j, b in enumerate(outputs) if j != i and similarity(a, b) >= agreement]
+        if len(group) >= quorum:
+            return group
+    return None
+
+
+async def _score(score: Score, output: str) -> float:
+    value = score(output)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+class Picker(Protocol):
+    async def pick(self, input: Any, outputs: list[str]) -> int:
+        """Index of the best output"""
+
+
+class Pick(BaseModel):
+    index: int = Field(..., description="number of the best option")
+
+
+class LLMPicker:
+    def __init__(self, agent: Agent):
+        self.agent = agent.clone(output_type=Pick)
+
+    async def pick(self, input: Any, outputs: list[str]) -> int:
+        options = "\n\n".join(f"Option {i}:\n{output}" for i, output in enumerate(outputs))
+        prompt = f"Input: {input}\n\n{options}\n\nReply with the number of the best option."
+        result = await Runner.run(self.agent, prompt)
+        index = result.final_output.index
+        return index if 0 <= index < len(outputs) else 0
+
+
+class MajorityPicker:
+    async def pick(self, input: Any, outputs: list[str]) -> int:
+        return medoid(outputs)
+
+
+class ScorePicker:
+    def __init__(self, score: Score):
+        self.score = score
+
+    async def pick(self, input: Any, outputs: list[str]) -> int:
+        scores = await asyncio.gather(*(_score(self.score, output) for output in outputs))
+        return max(range(len(outputs)), key=scores.__getitem__)
+
+
+@dataclass
+class BestOfNResult:
+    best: Optional[str]
+    samples: list[str] = field(default_factory=list)
+    picked_by: str = ""
+    cancelled: int = 0
+    failed: int = 0
+
+
+async def best_of_n(
+    agent: Agent,
+    input: Any,
+    n: int = 3,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    picker: Optional[Picker] = None,
+    quorum: Optional[int] = None,
+    agreement: float = 0.9,
+    score: Optional[Score] = None,
+    threshold: Optional[float] = None,
+    **run_kwargs,
+) -> BestOfNResult:
+    """
+    :param concurrency: samples running at the same time, default n
+    :param timeout: seconds per sample, slower samples are dropped
+    :param picker: used when sampling didn't stop early, default MajorityPicker
+    :param quorum: stop once this many samples agree
+    :param agreement: similarity (0..1) for two samples to agree
+    :param score: scoring function used with threshold
+    :param threshold: stop once a sample scores at least this
+    """
+    semaphore = asyncio.Semaphore(concurrency or n)
+    picker = picker or MajorityPicker()
+
+    async def sample() -> str:
+        async with semaphore:
+            result = await asyncio.wait_for(Runner.run(agent, input, **run_kwargs), timeout)
+            return str(result.final_output)
+
+    pending = {asyncio.create_task(sample()) for _ in range(n)}
+    outputs: list[str] = []
+    failed = 0
+    last_error: Optional[BaseException] = None
+    early: Optional[tuple[str, str]] = None
+
+    try:
+        while pending and early is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = []
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    failed += 1
+                    last_error = error
+                    logger.warning("Sample %d of %d from %s failed", failed, n, agent.name, exc_info=error)
+                    continue
+                finished.append(task.result())
+            outputs.extend(finished)
+            if finished and score is not None and threshold is not None:
+                # Several samples can finish together, take the best of them, not the first
+                scores = await asyncio.gather(*(_score(score, output) for output in finished))
+                best = max(range(len(finished)), key=scores.__getitem__)
+                if scores[best] >= threshold:
+                    early = (finished[best], "threshold")
+            if early is None and quorum and len(outputs) >= quorum:
+                group = agreeing_group(outputs, quorum, agreement)
+                if group:
+                    agreeing = [outputs[i] for i in group]
+                    early = (agreeing[medoid(agreeing)], "quorum")
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if not outputs:
+        raise RuntimeError(f"All {n} samples from {agent.name} failed") from last_error
+
+    result = BestOfNResult(best=None, samples=outputs, cancelled=len(pending), failed=failed)
+    if early is not None:
+        result.best, result.picked_by = early
+    elif len(outputs) == 1:
+        result.best, result.picked_by = outputs[0], "only sample"
+    elif agreeing_group(outputs, len(outputs), agreement):
+        # Every sample says the same thing, no need to ask the picker
+        result.best, result.picked_by = outputs[medoid(outputs)], "agreement"
+    elif outputs:
+        result.best = outputs[await picker.pick(input, outputs)]
+        result.picked_by = type(picker).__name__
+    return result
@@ -0,0 +1,301 @@
+"""
+History compaction for long lived sessions.
+
+CompactingSession wraps any session (SQLiteSession, the Telegram bot's
+ChatSession, ...) and keeps what the model sees bounded:
+
+- the last keep_turns turns are kept verbatim (a turn starts at a user message)
+- older turns are rolled into a running summary written by a cheap
+  summarizer agent; the summary is cached in the database
+- the compacted items are moved to an archive table, not deleted
+- get_items() never returns more than max_tokens, estimated locally
+
+Compaction runs in the background after add_items, so it doesn't add to the
+latency of the reply that triggered it.
+
+    session = CompactingSession(SQLiteSession("chat", "chat.db"), db_path="chat.db")
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Optional, Union
+
+from agents import Agent, Runner
+from agents.items import TResponseInputItem
+from agents.models.interface import Model
+from agents.memory import Session, SessionABC
+
+from .tokens import item_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+default_summarizer = Agent(
+    name="Summarizer",
+    model="gpt-4.1-nano",
+    instructions=(
+        "You compress chat history. Given an existing summary and the messages that follow it, "
+        "write an updated summary of the whole conversation. Keep facts, names, decisions, "
+        "preferences and open questions. Be brief, use bullet points, no preamble."
+    ),
+)
+
+
+class HistoryArchive:
+    """Archived items and the rolling summary, one row per session"""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS agent_archived_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    message_data TEXT NOT NULL,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_agent_archived_messages_session_id
+                ON agent_archived_messages (session_id, id)
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS agent_summaries (
+                    session_id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    archived_items INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
+    def _get_summary(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM agent_summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _archive(self, session_id: str, items: list[TResponseInputItem], summary: str):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO agent_archived_messages (session_id, message_data) VALUES (?, ?)",
+                [(session_id, json.dumps(item)) for item in items],
+            )
+            self._conn.execute(
+                """
+                INSERT INTO agent_summaries (session_id, summary, archived_items) VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    archived_items = archived_items + excluded.archived_items,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (session_id, summary, len(items)),
+            )
+
+    def _get_archived(self, session_id: str) -> list[TResponseInputItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message_data FROM agent_archived_messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _clear(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM agent_summaries WHERE session_id = ?", (session_id,))
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_summary, session_id)
+
+    async def archive(self, session_id: str, items: list[TResponseInputItem], summary: str):
+        await asyncio.to_thread(self._archive, session_id, items, summary)
+
+    async def get_archived(self, session_id: str) -> list[TResponseInputItem]:
+        """Everything that was compacted away, oldest first"""
+        return await asyncio.to_thread(self._get_archived, session_id)
+
+    async def clear(self, session_id: str):
+        """Forget the summary. Archived items are kept."""
+        await asyncio.to_thread(self._clear, session_id)
+
+
+def turn_starts(items: list[TResponseInputItem]) -> list[int]:
+    """Indexes of the items that start a turn"""
+    return [i for i, item in enumerate(items) if isinstance(item, dict) and item.get("role") == "user"]
+
+
+def _render(items: list[TResponseInputItem]) -> str:
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        role = item.get("role") or item.get("type", "item")
+        content = item.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        elif content is None:
+            content = item.get("output") or item.get("arguments") or ""
+        if content:
+            lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+async def replace_items(session: Session, items: list[TResponseInputItem]):
+    """Replace a session's items with items, in one transaction where the session allows it.
+
+    Sessions can provide their own replace_items(items), like the Telegram
+    bot's ChatSession does. Anything else (SQLiteSession, ...) is cleared and
+    refilled through its public API, shielded from cancellation (but not from
+    a crash).
+    """
+    if hasattr(session, "replace_items"):
+        await session.replace_items(items)
+    else:
+        async def clear_and_add():
+            await session.clear_session()
+            if items:
+                await session.add_items(items)
+
+        await asyncio.shield(clear_and_add())
+
+
+class CompactingSession(SessionABC):
+    def __init__(
+        self,
+        session: Session,
+        db_path: str = ":memory:",
+        keep_turns: int = 6,
+        compact_every: int = 4,
+        max_tokens: int = 4000,
+        summarizer: Optional[Agent] = default_summarizer,
+        archive: Optional[HistoryArchive] = None,
+        model: Optional[Union[str, Model]] = None,
+    ):
+        """
+        :param session: the session that stores the live items
+        :param keep_turns: turns kept verbatim after compaction
+        :param compact_every: extra turns to collect before compacting again, so the
+            summarizer runs once every few turns instead of after each one
+        :param max_tokens: budget for the items returned by get_items, summary included
+        :param summarizer: agent used to roll old turns into the summary. With None,
+            old turns are archived without a summary
+        :param model: model for the summarizer, usually the caller's own agent model.
+            The default summarizer uses gpt-4.1-nano, which needs OPENAI_API_KEY
+        """
+        self.session = session
+        self.session_id = session.session_id
+        self.keep_turns = keep_turns
+        self.compact_every = compact_every
+        self.max_tokens = max_tokens
+        if summarizer is not None and model is not None:
+            summarizer = summarizer.clone(model=model)
+        self.summarizer = summarizer
+        self.archive = archive or HistoryArchive(db_path)
+        self._summary: Optional[str] = None
+        self._summary_loaded = False
+        self._lock = asyncio.Lock()
+        self._compaction: Optional[asyncio.Task] = None
+        self.compactions = 0
+
+    @property
+    def busy(self) -> bool:
+        """A background compaction is running, see SessionStore eviction"""
+        return self._compaction is not None and not self._compaction.done()
+
+    async def _get_summary(self) -> Optional[str]:
+        if not self._summary_loaded:
+            self._summary = await self.archive.get_summary(self.session_id)
+            self._summary_loaded = True
+        return self._summary
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        if limit is not None and limit <= 0:
+            return []
+        async with self._lock:
+            summary = await self._get_summary()
+            prefix: list[TResponseInputItem] = []
+            if summary:
+                prefix = [{"role": "system", "content": SUMMARY_PREFIX + summary}]
+            # The summary counts towards the limit
+            if limit is not None:
+                limit -= len(prefix)
+            items = await self.session.get_items(limit) if limit != 0 else []
+
+        # Drop whole turns from the front until we fit the budget, always
+        # keeping the latest turn
+        budget = self.max_tokens - sum(item_tokens(item) for item in prefix)
+        costs = [item_tokens(item) for item in items]
+        total = sum(costs)
+        start = 0
+        for turn_start in turn_starts(items)[1:]:
+            if total <= budget:
+                break
+            total -= sum(costs[start:turn_start])
+            start = turn_start
+        return prefix + items[start:]
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        async with self._lock:
+            await self.session.add_items(items)
+        if self._compaction is None or self._compaction.done():
+            self._compaction = asyncio.create_task(self._maybe_compact())
+
+    async def _maybe_compact(self):
+        try:
+            await self.compact()
+        except Exception:
+            logger.exception("Compacting session %s failed", self.session_id)
+
+    async def compact(self, force: bool = False):
+        """Archive and summarize everything but the last keep_turns turns"""
+        items = await self.session.get_items()
+        starts = turn_starts(items)
+        if len(starts) <= self.keep_turns:
+            return
+        if not force and len(starts) < self.keep_turns + self.compact_every:
+            return
+
+        cut = starts[-self.keep_turns] if self.keep_turns else len(items)
+        old = items[:cut]
+        summary = await self._get_summary() or ""
+        # The summarizer call is slow, so it runs without holding the lock
+        if self.summarizer is not None:
+            summary = await self._summarize(summary, old)
+
+        async with self._lock:
+            items = await self.session.get_items()
+            if items[:cut] != old:
+                # The history was changed under us (popped or cleared), try again later
+                return
+            await self.archive.archive(self.session_id, old, summary)
+            await replace_items(self.session, items[cut:])
+            self._summary = summary or None
+            self.compactions += 1
+
+    async def _summarize(self, summary: str, items: list[TResponseInputItem]) -> str:
+        prompt = f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{_render(items)}"
+        result = await Runner.run(self.summarizer, prompt)
+        return str(result.final_output)
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        async with self._lock:
+            return await self.session.pop_item()
+
+    async def clear_session(self) -> None:
+        async with self._lock:
+            await self.session.clear_session()
+            await self.archive.clear(self.session_id)
+            self._summary = None
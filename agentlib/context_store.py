@@ -0,0 +1,154 @@
+"""
+Persistent run context.
+
+The context object passed to Runner.run (the thing tools see as
+RunContextWrapper.context) lives only in memory, so a restart forgets
+everything the tools saved. ContextStore keeps a pydantic context model in
+SQLite, usually the same file as the session, one row per field:
+
+- the context is loaded on first use for a session, then kept in memory
+- after every tool call, only the fields that changed since the last save
+  are written
+- is_complete() tells whether all fields are filled, so the caller can skip
+  the model call entirely
+
+    store = ContextStore(UserContext, "info.db")   # or factory=lambda: UserContext(...)
+    ctx = await store.get(session.session_id)
+    if not store.is_complete(ctx):
+        result = await store.run(agent, message, session=session)
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from agents import Agent, RunContextWrapper, RunHooks, Runner, RunResult, Session
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+_UNSET = object()
+
+
+class ContextStore(Generic[T]):
+    def __init__(self, model: type[T], db_path: str = ":memory:", factory: Optional[Callable[[], T]] = None):
+        """
+        :param model: the pydantic context model
+        :param factory: builds the context of a new session. Without it every
+            required field of model starts out as None, so they must be Optional
+        """
+        self.model = model
+        self.db_path = db_path
+        self.factory = factory
+        # Fail here rather than on the first message of a new session
+        self._new()
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS agent_context_fields (
+                    session_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, field)
+                )
+                """
+            )
+        self._contexts: dict[str, T] = {}
+        # What the database holds for each loaded session, to find dirty fields
+        self._saved: dict[str, dict[str, Any]] = {}
+
+    def _load(self, session_id: str) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT field, value FROM agent_context_fields WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {field: json.loads(value) for field, value in rows if field in self.model.model_fields}
+
+    def _write(self, session_id: str, fields: dict[str, Any]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO agent_context_fields (session_id, field, value, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(session_id, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                [(session_id, field, json.dumps(value), now) for field, value in fields.items()],
+            )
+
+    def _new(self) -> T:
+        if self.factory is not None:
+            return self.factory()
+        # Optional fields without a default start out empty
+        required = [name for name, info in self.model.model_fields.items() if info.is_required()]
+        try:
+            return self.model(**{name: None for name in required})
+        except ValidationError as e:
+            fields = ", ".join(sorted({str(error["loc"][0]) for error in e.errors() if error["loc"]}))
+            raise TypeError(
+                f"{self.model.__name__} can't start out empty: {fields} must be Optional, "
+                f"or pass factory= to ContextStore"
+            ) from e
+
+    async def get(self, session_id: str) -> T:
+        """The context of a session, read from the database the first time"""
+        context = self._contexts.get(session_id)
+        if context is None:
+            stored = await asyncio.to_thread(self._load, session_id)
+            context = self.model.model_validate({**self._new().model_dump(), **stored})
+            self._contexts[session_id] = context
+            self._saved[session_id] = context.model_dump(mode="json")
+        return context
+
+    def dirty(self, session_id: str) -> dict[str, Any]:
+        """Fields changed since the last save"""
+        context = self._contexts.get(session_id)
+        if context is None:
+            return {}
+        saved = self._saved.get(session_id, {})
+        current = context.model_dump(mode="json")
+        return {field: value for field, value in current.items() if saved.get(field, _UNSET) != value}
+
+    async def save(self, session_id: str) -> int:
+        """Write the dirty fields of a session, returns how many were written"""
+        fields = self.dirty(session_id)
+        if fields:
+            await asyncio.to_thread(self._write, session_id, fields)
+            self._saved[session_id].update(fields)
+            self.writes += len(fields)
+        return len(fields)
+
+    def missing(self, context: T) -> list[str]:
+        return [name for name in self.model.model_fields if getattr(context, name) is None]
+
+    def is_complete(self, context: T) -> bool:
+        return not self.missing(context)
+
+    def hooks(self, session_id: str) -> RunHooks:
+        return _SaveAfterTools(self, session_id)
+
+    async def run(self, agent: Agent, input: Any, session: Session, **kwargs) -> RunResult:
+        """Runner.run with the session's stored context, saving changes after every tool call"""
+        context = await self.get(session.session_id)
+        try:
+            return await Runner.run(
+                agent, input, session=session, context=context, hooks=self.hooks(session.session_id), **kwargs
+            )
+        finally:
+            await self.save(session.session_id)
+
+
+class _SaveAfterTools(RunHooks):
+    def __init__(self, store: ContextStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    async def on_tool_end(self, context: RunContextWrapper, agent: Agent, tool: Any, result: Any) -> None:
+        await self.store.save(self.session_id)
@@ -0,0 +1,100 @@
+"""
+A conversation loop that doesn't resend the whole history every turn.
+
+Conversation keeps the history in an append-only list. On every turn it
+sends only what's new:
+
+- with server side state (OpenAI Responses models) the new user message is
+  sent with previous_response_id, and the server already has the rest
+- otherwise it sends a trimmed local history: the last max_turns turns,
+  within max_tokens
+
+    conversation = Conversation(agent)
+    result = await conversation.send("hello")
+"""
+
+import logging
+from typing import Optional
+
+from agents import Agent, OpenAIResponsesModel, Runner
+from agents.items import TResponseInputItem
+
+from .compaction import turn_starts
+from .tokens import item_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def supports_server_state(agent: Agent) -> bool:
+    """True when the agent's model keeps conversation state on the server (Responses API)"""
+    model = agent.model
+    if model is None or isinstance(model, str):
+        # Model names are resolved by the default OpenAI provider, which uses the Responses API
+        return "/" not in (model or "")
+    return isinstance(model, OpenAIResponsesModel)
+
+
+class Conversation:
+    def __init__(
+        self,
+        agent: Agent,
+        server_state: Optional[bool] = None,
+        max_turns: int = 20,
+        max_tokens: int = 8000,
+        debug: bool = False,
+    ):
+        """
+        :param server_state: use previous_response_id. None detects it from the agent's model
+        :param max_turns: turns of local history sent when there is no server state
+        :param max_tokens: token budget for the local history
+        :param debug: print the items added by every turn
+        """
+        self.agent = agent
+        self.server_state = supports_server_state(agent) if server_state is None else server_state
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.debug = debug
+        self.history: list[TResponseInputItem] = []
+        self.last_response_id: Optional[str] = None
+
+    def trimmed_history(self) -> list[TResponseInputItem]:
+        """The last max_turns turns of the history that fit in max_tokens"""
+        starts = turn_starts(self.history)
+        if not starts:
+            return list(self.history)
+        start = starts[-self.max_turns] if len(starts) > self.max_turns else starts[0]
+        total = sum(item_tokens(item) for item in self.history[start:])
+        for turn_start in starts:
+            if turn_start <= start:
+                continue
+            if total <= self.max_tokens:
+                break
+            total -= sum(item_tokens(item) for item in self.history[start:turn_start])
+            start = turn_start
+        return self.history[start:]
+
+    async def send(self, message: str | list[TResponseInputItem], **kwargs):
+        """Run the agent on the new message and return the RunResult"""
+        new_input = [{"role": "user", "content": message}] if isinstance(message, str) else list(message)
+
+        if self.server_state and self.last_response_id is not None:
+            result = await Runner.run(
+                self.agent,
+                new_input,
+                previous_response_id=self.last_response_id,
+                **kwargs,
+            )
+        else:
+            result = await Runner.run(self.agent, self.trimmed_history() + new_input, **kwargs)
+
+        delta = new_input + [item.to_input_item() for item in result.new_items]
+        self.history.extend(delta)
+        if self.server_state:
+            self.last_response_id = result.last_response_id
+            if self.last_response_id is None:
+                logger.info("Model returned no response id, falling back to local history")
+                self.server_state = False
+
+        if self.debug:
+            print(f"Debug: new messages = {delta}")
+        return result
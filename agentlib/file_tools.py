@@ -0,0 +1,362 @@
+"""
+Paging through large files from an agent.
+
+Reading a whole file into the prompt doesn't work for big logs: it blows the
+context window and process memory. These tools let the agent look at a file
+a window at a time instead. Files are read through mmap, so only the pages
+that are touched are loaded.
+
+- file_info: size, line count and an estimate of the number of chunks,
+  extrapolated from the first chunk
+- read_chunk: chunk N, chunks end on a line boundary and fit in both a byte
+  and a token budget
+- read_lines: a line range
+- grep_file: regex matches with a few lines of context. Patterns are model
+  supplied, so they are length limited, nested quantifiers like (a+)+ are
+  refused and the search stops at a deadline
+
+Chunk boundaries are found lazily, only up to the chunk that is read.
+Line indexes, chunk boundaries and decoded chunks are cached per file and
+thrown away when the file's mtime or size changes. A replaced file is only
+unmapped once the last tool call reading it is done.
+
+    agent = Agent(..., tools=file_tools(allowed=["/etc/shells"]))
+"""
+
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from agents import FunctionTool, function_tool
+
+from .tokens import count_tokens
+from .tool_exec import pooled
+
+DEFAULT_CHUNK_BYTES = 16 * 1024
+DEFAULT_CHUNK_TOKENS = 4000
+MAX_LINES = 500
+MAX_MATCHES = 50
+MAX_PATTERN = 200
+GREP_SECONDS = 5.0
+# Lines are searched in blocks of about this size, the deadline is checked between blocks
+GREP_BLOCK = 256 * 1024
+# A quantified group that itself ends in a quantifier: (a+)+, (\w*)*, (x+){2,}
+NESTED_QUANTIFIER = re.compile(r"\((?:[^()\\]|\\.)*[+*}]\)[+*{]")
+
+
+class MappedFile:
+    """
+    One version (mtime, size) of a file, mapped into memory. Use it as a context
+    manager: the cache holds one reference and every reader another, the file is
+    unmapped when the last one is released.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int, chunk_tokens: int):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.chunk_tokens = chunk_tokens
+        self._file = open(path, "rb")
+        st = os.fstat(self._file.fileno())
+        self.version = (st.st_mtime_ns, st.st_size)
+        self.size = st.st_size
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._lines: Optional[array] = None
+        # Byte offsets where chunks start, computed as far as anyone asked
+        self._chunk_starts: list[int] = [0]
+        self._chunk_text: OrderedDict[int, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._refs = 1
+
+    def acquire(self) -> "MappedFile":
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            last = self._refs == 0
+        if last:
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+            self._file.close()
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @property
+    def line_starts(self) -> array:
+        """Byte offset of the start of every line"""
+        if self._lines is None:
+            starts = array("q", [0])
+            pos = self.data.find(b"\n")
+            while pos != -1 and pos + 1 < self.size:
+                starts.append(pos + 1)
+                pos = self.data.find(b"\n", pos + 1)
+            self._lines = starts
+        return self._lines
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) if self.size else 0
+
+    def lines(self, start: int, count: int) -> list[str]:
+        """`count` lines starting at line `start` (0 based)"""
+        starts = self.line_starts
+        if start >= len(starts):
+            return []
+        end = min(start + count, len(starts))
+        end_offset = starts[end] if end < len(starts) else self.size
+        # Split on "\n" only, like line_starts; str.splitlines() would also split on \x0b, \x0c, ...
+        raw = self.data[starts[start]:end_offset].split(b"\n")
+        if raw and raw[-1] == b"":
+            raw.pop()
+        return [line.decode("utf8", errors="replace").removesuffix("\r") for line in raw]
+
+    def _chunk_end(self, start: int) -> int:
+        end = min(start + self.chunk_bytes, self.size)
+        if end < self.size:
+            newline = self.data.rfind(b"\n", start, end)
+            # A single line longer than the budget is cut at the byte limit
+            if newline != -1:
+                end = newline + 1
+        # Shrink, still on line boundaries, until the chunk fits the token budget
+        while count_tokens(self.data[start:end].decode("utf8", errors="replace")) > self.chunk_tokens:
+            half = start + (end - start) // 2
+            newline = self.data.rfind(b"\n", start, half)
+            new_end = newline + 1 if newline != -1 else half
+            if new_end <= start or new_end >= end:
+                break
+            end = new_end
+        return end
+
+    def chunk_bounds(self, index: int) -> Optional[tuple[int, int]]:
+        if index < 0:
+            raise ValueError(f"Chunk index must be 0 or more, got {index}")
+        with self._lock:
+            while len(self._chunk_starts) <= index + 1:
+                start = self._chunk_starts[-1]
+                if start >= self.size:
+                    break
+                self._chunk_starts.append(self._chunk_end(start))
+            if index + 1 >= len(self._chunk_starts):
+                return None
+            return self._chunk_starts[index], self._chunk_starts[index + 1]
+
+    def chunk_count(self) -> int:
+        """Exact number of chunks. This finds every boundary, which tokenizes the whole file."""
+        index = len(self._chunk_starts) - 1
+        while self.chunk_bounds(index) is not None:
+            index += 1
+        return index
+
+    @property
+    def chunks_known(self) -> bool:
+        """Whether every chunk boundary was found, making the estimate exact"""
+        return self._chunk_starts[-1] >= self.size
+
+    def estimated_chunk_count(self) -> int:
+        """
+        Chunks found so far plus the rest of the file at their average size.
+        Finds the first chunk if needed; exact once every boundary is known.
+        """
+        if self.size and len(self._chunk_starts) == 1:
+            self.chunk_bounds(0)
+        known = len(self._chunk_starts) - 1
+        end = self._chunk_starts[-1]
+        if self.chunks_known:
+            return known
+        return known + -(-(self.size - end) * known // end)
+
+    def chunk(self, index: int) -> Optional[str]:
+        with self._lock:
+            text = self._chunk_text.get(index)
+            if text is not None:
+                self._chunk_text.move_to_end(index)
+                return text
+        bounds = self.chunk_bounds(index)
+        if bounds is None:
+            return None
+        text = self.data[bounds[0]:bounds[1]].decode("utf8", errors="replace")
+        with self._lock:
+            self._chunk_text[index] = text
+            while len(self._chunk_text) > 32:
+                self._chunk_text.popitem(last=False)
+        return text
+
+    def grep(
+        self, pattern: str, context: int, max_matches: int, seconds: float = GREP_SECONDS
+    ) -> tuple[list[tuple[int, list[str]]], bool]:
+        """
+        (line number, lines around it) for the first max_matches matching lines, and
+        whether the whole file was searched before the deadline. Matches don't span
+        blocks of lines, so a pattern matching across lines may miss some.
+        """
+        regex = compile_pattern(pattern)
+        deadline = time.monotonic() + seconds
+        starts = self.line_starts
+        matches = []
+        last_line = -1
+        block_start = 0
+        while block_start < self.size:
+            if time.monotonic() > deadline:
+                return matches, False
+            block_end = min(block_start + GREP_BLOCK, self.size)
+            if block_end < self.size:
+                newline = self.data.find(b"\n", block_end)
+                block_end = newline + 1 if newline != -1 else self.size
+            for match in regex.finditer(self.data, block_start, block_end):
+                line = _line_of(starts, match.start())
+                if line == last_line:
+                    continue
+                last_line = line
+                first = max(0, line - context)
+                matches.append((line + 1, self.lines(first, line - first + context + 1)))
+                if len(matches) >= max_matches:
+                    return matches, True
+            block_start = block_end
+        return matches, True
+
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Compile a model supplied pattern, refusing long ones and ones prone to catastrophic backtracking"""
+    if len(pattern) > MAX_PATTERN:
+        raise ValueError(f"Pattern is {len(pattern)} characters, the limit is {MAX_PATTERN}")
+    if NESTED_QUANTIFIER.search(pattern):
+        raise ValueError("Nested quantifiers like (a+)+ are not allowed, simplify the pattern")
+    return re.compile(pattern.encode("utf8"), re.MULTILINE)
+
+
+def _line_of(starts: array, offset: int) -> int:
+    low, high = 0, len(starts) - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if starts[mid] <= offset:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class FileCache:
+    """MappedFile per path, replaced when the file changes"""
+
+    def __init__(self, max_files: int = 16, chunk_bytes: int = DEFAULT_CHUNK_BYTES, chunk_tokens: int = DEFAULT_CHUNK_TOKENS):
+        self.max_files = max_files
+        self.chunk_bytes = chunk_bytes
+        self.chunk_tokens = chunk_tokens
+        self._files: OrderedDict[str, MappedFile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> MappedFile:
+        """The file, acquired for the caller: use it in a with block"""
+        st = os.stat(path)
+        with self._lock:
+            mapped = self._files.get(path)
+            if mapped is not None and mapped.version == (st.st_mtime_ns, st.st_size):
+                self._files.move_to_end(path)
+                return mapped.acquire()
+            if mapped is not None:
+                # Other threads may still be reading the old version
+                mapped.release()
+            mapped = self._files[path] = MappedFile(path, self.chunk_bytes, self.chunk_tokens)
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)[1].release()
+            return mapped.acquire()
+
+
+def file_tools(
+    allowed: list[str],
+    cache: Optional[FileCache] = None,
+    timeout: float = 30,
+) -> list[FunctionTool]:
+    """
+    Tools to page through files. Only paths inside `allowed` (files, or directories
+    and everything under them) can be read.
+    """
+    cache = cache or FileCache()
+    roots = [os.path.realpath(path) for path in allowed]
+
+    def open_file(path: str) -> MappedFile:
+        real = os.path.realpath(path)
+        if not any(real == root or real.startswith(root.rstrip(os.sep) + os.sep) for root in roots):
+            raise PermissionError(f"{path} is not in the allowed paths")
+        return cache.get(real)
+
+    @function_tool
+    @pooled(timeout=timeout)
+    def file_info(path: str) -> str:
+        """
+        Size, number of lines and an estimate of how many chunks a file has. Call this
+        first, then page through the file with read_chunk, read_lines or grep_file.
+        :param path: the file path
+        """
+        with open_file(path) as mapped:
+            chunks = mapped.estimated_chunk_count()
+            if mapped.chunks_known:
+                return f"{path}: {mapped.size} bytes, {mapped.line_count} lines, {chunks} chunks"
+            return (
+                f"{path}: {mapped.size} bytes, {mapped.line_count} lines, "
+                f"an estimated {chunks} chunks (read_chunk tells the exact count when asked for a chunk past the end)"
+            )
+
+    @function_tool
+    @pooled(timeout=timeout)
+    def read_chunk(path: str, index: int) -> str:
+        """
+        Read one chunk of a file. Chunks end on line boundaries.
+        :param path: the file path
+        :param index: chunk number, starting at 0
+        """
+        with open_file(path) as mapped:
+            text = mapped.chunk(index)
+            if text is None:
+                # Reading past the end found every boundary, so the count is exact now
+                return f"{path} has no chunk {index}, it has {mapped.chunk_count()} chunks"
+            return text
+
+    @function_tool
+    @pooled(timeout=timeout)
+    def read_lines(path: str, start: int, count: int = 100) -> str:
+        """
+        Read a range of lines from a file, prefixed with their line numbers.
+        :param path: the file path
+        :param start: first line to read, starting at 1
+        :param count: how many lines to read (at most 500)
+        """
+        with open_file(path) as mapped:
+            lines = mapped.lines(max(start, 1) - 1, min(count, MAX_LINES))
+        return "\n".join(f"{n}: {line}" for n, line in enumerate(lines, start=max(start, 1)))
+
+    @function_tool
+    @pooled(timeout=timeout)
+    def grep_file(path: str, pattern: str, context: int = 2) -> str:
+        """
+        Find lines matching a regular expression, with a few lines around each match.
+        :param path: the file path
+        :param pattern: Python regular expression, matched within a line (at most 200 characters)
+        :param context: lines to show before and after each match
+        """
+        # Stop well before the tool timeout, which can't interrupt the search thread
+        with open_file(path) as mapped:
+            matches, complete = mapped.grep(
+                pattern, max(context, 0), MAX_MATCHES, seconds=min(GREP_SECONDS, timeout / 2)
+            )
+        note = "" if complete else "\n--\nSearch stopped at the time limit, try a simpler pattern"
+        if not matches:
+            return "No matches" + note
+        blocks = []
+        for line, lines in matches:
+            first = max(1, line - context)
+            blocks.append("\n".join(f"{n}: {text}" for n, text in enumerate(lines, start=first)))
+        return "\n--\n".join(blocks) + note
+
+    return [file_info, read_chunk, read_lines, grep_file]
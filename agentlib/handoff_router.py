@@ -0,0 +1,157 @@
+"""
+Skip the triage turn when the target agent is obvious.
+
+A triage agent spends a whole model round trip just to call a handoff tool.
+For messages like "translate to French: 'hello world'" the answer is known
+before asking. HandoffRouter tries deterministic rules first. A rule is a
+regex whose named groups become the handoff's input payload. When a rule
+matches with enough confidence, the router invokes that handoff itself (so
+input validation and on_handoff still run) and runs the target agent
+directly. Anything else goes through the triage agent as before.
+
+    router = HandoffRouter(triage_agent, [
+        Rule(r"^translate to french:(?P<text_to_translate>.+)$", french_agent),
+    ])
+    result = await router.run("translate to French: 'hello world'")
+    print(router.stats)
+"""
+
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+from agents import Agent, Handoff, RunContextWrapper, Runner, RunResult, TResponseInputItem
+from agents.exceptions import ModelBehaviorError
+
+TRIAGE = "triage"
+
+
+@dataclass
+class Rule:
+    """Route messages matching `pattern` to `target`, its named groups are the handoff payload"""
+
+    pattern: Union[str, re.Pattern]
+    target: Agent
+    confidence: float = 1.0
+    flags: int = re.IGNORECASE | re.DOTALL
+
+    def __post_init__(self):
+        if isinstance(self.pattern, str):
+            self.pattern = re.compile(self.pattern, self.flags)
+
+    def match(self, text: str) -> Optional[dict[str, str]]:
+        match = self.pattern.search(text)
+        if match is None:
+            return None
+        return {key: value.strip() for key, value in match.groupdict().items() if value is not None}
+
+
+@dataclass
+class Route:
+    agent: Agent
+    payload: Optional[dict[str, str]] = None
+    confidence: float = 0.0
+    # Rules disagreed, so it goes to triage
+    ambiguous: bool = False
+
+    @property
+    def fast(self) -> bool:
+        return self.payload is not None
+
+
+@dataclass
+class RouterStats:
+    paths: Counter = field(default_factory=Counter)
+    ambiguous: int = 0
+    rejected: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.paths.values())
+
+    @property
+    def fast_share(self) -> float:
+        return 1 - self.paths[TRIAGE] / self.total if self.total else 0.0
+
+    def __str__(self) -> str:
+        paths = ", ".join(f"{name}: {count}" for name, count in self.paths.most_common())
+        return f"{paths} ({self.fast_share:.0%} skipped triage, {self.ambiguous} ambiguous, {self.rejected} rejected payloads)"
+
+
+def _text_of(input: Union[str, list[TResponseInputItem]]) -> str:
+    """The last user message of a run input"""
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if item.get("role") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, str):
+            return content
+        return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+    return ""
+
+
+class HandoffRouter:
+    def __init__(self, triage: Agent, rules: list[Rule], min_confidence: float = 0.8):
+        """
+        :param triage: the agent whose handoffs the rules shortcut, it handles everything else
+        :param rules: checked in order, the most confident match wins
+        :param min_confidence: matches below this go to triage
+        """
+        self.triage = triage
+        self.rules = rules
+        self.min_confidence = min_confidence
+        self.stats = RouterStats()
+        self._handoffs = {
+            item.agent_name if isinstance(item, Handoff) else item.name: item for item in triage.handoffs
+        }
+        for rule in rules:
+            if rule.target.name not in self._handoffs:
+                raise ValueError(f"{triage.name} has no handoff to {rule.target.name}")
+
+    def route(self, input: Union[str, list[TResponseInputItem]]) -> Route:
+        """Where input would go, without running anything"""
+        text = _text_of(input)
+        best: Optional[Route] = None
+        tied = False
+        for rule in self.rules:
+            if rule.confidence < self.min_confidence:
+                continue
+            payload = rule.match(text)
+            if payload is None:
+                continue
+            if best is None or rule.confidence > best.confidence:
+                best, tied = Route(rule.target, payload, rule.confidence), False
+            elif rule.confidence == best.confidence and rule.target is not best.agent:
+                tied = True
+        if best is None:
+            return Route(self.triage)
+        if tied:
+            # "translate to French and Spanish" is for the model to sort out
+            return Route(self.triage, ambiguous=True)
+        return best
+
+    async def _invoke_handoff(self, route: Route, context: Any) -> Optional[Agent]:
+        item = self._handoffs[route.agent.name]
+        if not isinstance(item, Handoff):
+            return item
+        try:
+            return await item.on_invoke_handoff(RunContextWrapper(context=context), json.dumps(route.payload))
+        except ModelBehaviorError:
+            # The payload doesn't fit the handoff's input type
+            self.stats.rejected += 1
+            return None
+
+    async def run(self, input: Union[str, list[TResponseInputItem]], context: Any = None, **kwargs) -> RunResult:
+        """Runner.run on the target agent when a rule is sure, on the triage agent otherwise"""
+        route = self.route(input)
+        if route.ambiguous:
+            self.stats.ambiguous += 1
+        agent = await self._invoke_handoff(route, context) if route.fast else None
+        if agent is None:
+            agent = self.triage
+        self.stats.paths[TRIAGE if agent is self.triage else agent.name] += 1
+        return await Runner.run(agent, input, context=context, **kwargs)
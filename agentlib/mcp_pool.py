@@ -0,0 +1,350 @@
+"""
+Warm, shared MCP connections with cached tool lists and fetch results.
+
+MCPPool keeps MCP servers (MCPServerStreamableHttp, MCPServerStdio, ...)
+connected across runs. Before handing a server out it pings it if it hasn't
+been checked for health_interval seconds, and reconnects it if the ping fails.
+
+Every server in the pool is wrapped in a CachedServer, which
+
+- saves the tools list to disk (with a format version and a TTL), so a cold
+  start can build the agent without a list_tools round trip
+- caches results of idempotent tools (the fetch server's `fetch`) by server
+  and arguments. The page's validators (ETag / Last-Modified) are read with a
+  HEAD when a URL is first cached. After `fresh_for` seconds a result is
+  revalidated with a conditional GET and only refetched through MCP if the
+  page changed. Pages without validators are simply refetched through MCP
+
+Each server is connected and cleaned up by its own long-lived task: the MCP
+SDK's anyio cancel scopes have to be exited by the task that entered them.
+
+    pool = MCPPool()
+    fetch = pool.add(MCPServerStreamableHttp(name="fetch", params={"url": "..."}))
+    async with pool:
+        agent = Agent(..., mcp_servers=[await pool.get("fetch")])
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+from mcp.types import CallToolResult, Tool
+from agents.mcp import MCPServer
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk format of the tools cache changes
+TOOLS_CACHE_VERSION = 1
+
+
+class ToolsListCache:
+    def __init__(self, directory: str = ".mcp_cache", ttl: float = 24 * 3600):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, server_name: str) -> str:
+        digest = hashlib.sha256(server_name.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"tools-{digest}.json")
+
+    def load(self, server_name: str) -> Optional[list[Tool]]:
+        try:
+            with open(self._path(server_name), encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != TOOLS_CACHE_VERSION or data.get("server") != server_name:
+            return None
+        if time.time() - data.get("saved_at", 0) > self.ttl:
+            return None
+        return [Tool.model_validate(tool) for tool in data["tools"]]
+
+    def save(self, server_name: str, tools: list[Tool]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(server_name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(
+                {
+                    "version": TOOLS_CACHE_VERSION,
+                    "server": server_name,
+                    "saved_at": time.time(),
+                    "tools": [tool.model_dump(mode="json") for tool in tools],
+                },
+                f,
+            )
+        os.replace(tmp, path)
+
+    def clear(self, server_name: str):
+        try:
+            os.remove(self._path(server_name))
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class _CachedResult:
+    result: CallToolResult
+    checked_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ResultCache:
+    """Results of idempotent URL tools, revalidated with conditional requests"""
+
+    def __init__(self, tools: tuple[str, ...] = ("fetch",), fresh_for: float = 300, max_entries: int = 512):
+        self.tools = tools
+        self.fresh_for = fresh_for
+        self.max_entries = max_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, _CachedResult] = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _key(self, server_name: str, tool_name: str, arguments: Optional[dict]) -> str:
+        return server_name + ":" + tool_name + ":" + json.dumps(arguments or {}, sort_keys=True)
+
+    async def _request(self, method: str, url: str, entry: Optional[_CachedResult] = None) -> Optional[httpx.Response]:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10, follow_redirects=True)
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        try:
+            return await self._client.request(method, url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.info("%s %s failed: %s", method, url, e)
+            return None
+
+    async def call(self, server: MCPServer, tool_name: str, arguments: Optional[dict], *args, **kwargs) -> CallToolResult:
+        key = self._key(server.name, tool_name, arguments)
+        url = (arguments or {}).get("url")
+        entry = self._entries.get(key)
+        now = time.time()
+        # Where the new entry's validators come from: a HEAD for a URL seen for
+        # the first time, the revalidation response on a refresh, nowhere for
+        # pages that didn't send any the first time
+        validated: Optional[httpx.Response] = None
+        look_up_validators = url and entry is None
+
+        if entry is not None:
+            if now - entry.checked_at < self.fresh_for:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.result
+            if url and entry.has_validators:
+                response = await self._request("GET", url, entry)
+                if response is not None and response.status_code == 304:
+                    self.revalidated += 1
+                    entry.checked_at = now
+                    self._entries.move_to_end(key)
+                    return entry.result
+                if response is not None and response.status_code < 400:
+                    validated = response
+
+        self.misses += 1
+        result = await server.call_tool(tool_name, arguments, *args, **kwargs)
+        if result.isError:
+            return result
+
+        entry = _CachedResult(result=result, checked_at=now)
+        if look_up_validators:
+            validated = await self._request("HEAD", url)
+            if validated is not None and validated.status_code >= 400:
+                validated = None
+        if validated is not None:
+            entry.etag = validated.headers.get("ETag")
+            entry.last_modified = validated.headers.get("Last-Modified")
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class CachedServer(MCPServer):
+    def __init__(
+        self,
+        server: MCPServer,
+        tools_cache: Optional[ToolsListCache] = None,
+        result_cache: Optional[ResultCache] = None,
+    ):
+        # No MCPServer.__init__: it would set use_structured_content on the
+        # wrapper and hide the wrapped server's value from __getattr__
+        self.server = server
+        self.tools_cache = tools_cache
+        self.result_cache = result_cache
+        self.connected = False
+        self._tools: Optional[list[Tool]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything we don't wrap (use_structured_content, session, ...) comes from the real server
+        if name == "server":
+            raise AttributeError(name)
+        return getattr(self.server, name)
+
+    @property
+    def name(self) -> str:
+        return self.server.name
+
+    async def connect(self):
+        await self.server.connect()
+        self.connected = True
+
+    async def cleanup(self):
+        self.connected = False
+        await self.server.cleanup()
+
+    async def list_tools(self, run_context=None, agent=None) -> list[Tool]:
+        if getattr(self.server, "tool_filter", None) is not None:
+            # The filtered list depends on the run and the agent, don't share it
+            return await self.server.list_tools(run_context, agent)
+        if self._tools is None and self.tools_cache is not None:
+            self._tools = self.tools_cache.load(self.name)
+        if self._tools is None:
+            self._tools = await self.server.list_tools(run_context, agent)
+            if self.tools_cache is not None:
+                self.tools_cache.save(self.name, self._tools)
+        return self._tools
+
+    def invalidate_tools_cache(self):
+        self._tools = None
+        if self.tools_cache is not None:
+            self.tools_cache.clear(self.name)
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict], *args, **kwargs) -> CallToolResult:
+        if self.result_cache is not None and tool_name in self.result_cache.tools:
+            return await self.result_cache.call(self.server, tool_name, arguments, *args, **kwargs)
+        return await self.server.call_tool(tool_name, arguments, *args, **kwargs)
+
+    async def list_prompts(self, *args, **kwargs):
+        return await self.server.list_prompts(*args, **kwargs)
+
+    async def get_prompt(self, *args, **kwargs):
+        return await self.server.get_prompt(*args, **kwargs)
+
+    async def ping(self):
+        session = getattr(self.server, "session", None)
+        if session is not None:
+            await session.send_ping()
+        else:
+            await self.server.list_tools()
+
+
+class MCPPool:
+    def __init__(
+        self,
+        health_interval: float = 30,
+        tools_cache: Optional[ToolsListCache] = None,
+        result_cache: Optional[ResultCache] = None,
+    ):
+        self.health_interval = health_interval
+        self.tools_cache = tools_cache or ToolsListCache()
+        self.result_cache = result_cache or ResultCache()
+        self.reconnects = 0
+        self._servers: dict[str, CachedServer] = {}
+        self._checked_at: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._owners: dict[str, asyncio.Task] = {}
+        self._requests: dict[str, asyncio.Queue] = {}
+
+    def add(self, server: MCPServer) -> CachedServer:
+        cached = CachedServer(server, self.tools_cache, self.result_cache)
+        self._servers[server.name] = cached
+        self._locks[server.name] = asyncio.Lock()
+        return cached
+
+    async def _own(self, name: str, requests: asyncio.Queue):
+        """Connects, reconnects and cleans up one server, always from this task"""
+        server = self._servers[name]
+        while True:
+            op, done = await requests.get()
+            try:
+                if op in ("reconnect", "close") and server.connected:
+                    try:
+                        await server.cleanup()
+                    except Exception as e:
+                        if op != "reconnect":
+                            raise
+                        logger.info("Cleaning up MCP server %s failed: %s", name, e)
+                if op in ("connect", "reconnect"):
+                    await server.connect()
+            except BaseException as e:
+                if not done.done():
+                    done.set_exception(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            else:
+                if not done.done():
+                    done.set_result(None)
+            if op == "close":
+                return
+
+    async def _run(self, name: str, op: str):
+        """Have the server's own task do op and wait for it"""
+        if name not in self._owners or self._owners[name].done():
+            self._requests[name] = asyncio.Queue()
+            self._owners[name] = asyncio.create_task(self._own(name, self._requests[name]))
+        done = asyncio.get_running_loop().create_future()
+        await self._requests[name].put((op, done))
+        await done
+
+    async def start(self):
+        for name in self._servers:
+            await self.get(name)
+
+    async def get(self, name: str) -> CachedServer:
+        """The named server, connected and recently checked"""
+        server = self._servers[name]
+        async with self._locks[name]:
+            if not server.connected:
+                await self._run(name, "connect")
+                self._checked_at[name] = time.monotonic()
+            elif time.monotonic() - self._checked_at.get(name, 0) > self.health_interval:
+                try:
+                    await asyncio.wait_for(server.ping(), 10)
+                except Exception as e:
+                    logger.warning("MCP server %s failed its health check (%s), reconnecting", name, e)
+                    self.reconnects += 1
+                    await self._run(name, "reconnect")
+                self._checked_at[name] = time.monotonic()
+        return server
+
+    async def all(self) -> list[CachedServer]:
+        return [await self.get(name) for name in self._servers]
+
+    async def close(self):
+        for name in list(self._owners):
+            if not self._owners[name].done():
+                try:
+                    await self._run(name, "close")
+                except Exception as e:
+                    logger.warning("Closing MCP server %s failed: %s", name, e)
+        self._owners.clear()
+        self._requests.clear()
+        await self.result_cache.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,154 @@
+"""
+Shared model objects and HTTP connection pools.
+
+Building a new LitellmModel or OpenAI client for every agent means a new
+HTTP client, and usually a new TLS handshake, for every call. ModelRegistry
+hands out one model object per (provider, model, api key) and keeps one
+keep-alive connection pool per (provider, api key):
+
+- "gpt-4.1" style names get an OpenAIResponsesModel on a shared AsyncOpenAI client
+- "provider/model" names that LiteLLM knows as OpenAI compatible (github/...)
+  get an OpenAIChatCompletionsModel on a shared AsyncOpenAI client, pointed at
+  the API base LiteLLM resolves for the provider
+- other "provider/model" names (openrouter/...) get a LitellmModel that passes
+  its own timeout with every call, LiteLLM keeps the connections. LiteLLM's
+  module globals are left alone.
+
+    model = get_model("github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"])
+"""
+
+import functools
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+from agents import ModelSettings, OpenAIChatCompletionsModel, OpenAIResponsesModel
+from agents.models.interface import Model
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    max_connections: int = int(os.environ.get("AGENT_HTTP_MAX_CONNECTIONS", 100))
+    max_keepalive_connections: int = int(os.environ.get("AGENT_HTTP_MAX_KEEPALIVE", 20))
+    keepalive_expiry: float = float(os.environ.get("AGENT_HTTP_KEEPALIVE_EXPIRY", 60))
+    timeout: float = float(os.environ.get("AGENT_HTTP_TIMEOUT", 120))
+    connect_timeout: float = float(os.environ.get("AGENT_HTTP_CONNECT_TIMEOUT", 10))
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+        )
+
+
+def _fingerprint(api_key: Optional[str]) -> str:
+    # Keys are only used to tell pools apart, no need to keep them around in the clear
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+
+
+def split_model_name(name: str) -> tuple[str, str]:
+    """("openrouter", "google/gemini-2.5-pro") for "openrouter/google/gemini-2.5-pro" """
+    if "/" not in name:
+        return "openai", name
+    provider, model = name.split("/", 1)
+    return provider, model
+
+
+class ModelRegistry:
+    def __init__(self, settings: PoolSettings = PoolSettings()):
+        self.settings = settings
+        self._models: dict[tuple, Model] = {}
+        self._clients: dict[tuple, httpx.AsyncClient] = {}
+        self._openai_clients: dict[tuple, AsyncOpenAI] = {}
+        self.created = 0
+        self.reused = 0
+
+    def http_client(self, provider: str, api_key: Optional[str] = None) -> httpx.AsyncClient:
+        key = (provider, _fingerprint(api_key))
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._clients[key] = self.settings.client()
+        return client
+
+    def get(self, name: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Model:
+        provider, model_name = split_model_name(name)
+        key = (provider, model_name, _fingerprint(api_key), base_url)
+        model = self._models.get(key)
+        if model is not None:
+            self.reused += 1
+            return model
+
+        if provider == "openai":
+            model = OpenAIResponsesModel(model_name, self._openai_client(api_key, base_url))
+        else:
+            model = self._litellm_model(name, api_key, base_url)
+        self._models[key] = model
+        self.created += 1
+        return model
+
+    def _openai_client(self, api_key: Optional[str], base_url: Optional[str], provider: str = "openai") -> AsyncOpenAI:
+        key = (provider, _fingerprint(api_key), base_url)
+        client = self._openai_clients.get(key)
+        if client is None:
+            client = self._openai_clients[key] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self.http_client(provider, api_key),
+            )
+        return client
+
+    def _litellm_model(self, name: str, api_key: Optional[str], base_url: Optional[str]) -> Model:
+        import litellm
+
+        model_name, provider, provider_key, api_base = litellm.get_llm_provider(name, api_base=base_url, api_key=api_key)
+        # LiteLLM would send these through the OpenAI SDK anyway, do it on our pool
+        if provider in litellm.openai_compatible_providers and api_base and (api_key or provider_key):
+            client = self._openai_client(api_key or provider_key, api_base, provider)
+            return OpenAIChatCompletionsModel(model_name, client)
+        return _timed_litellm_model()(model=name, api_key=api_key, base_url=base_url, timeout=self.settings.timeout)
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._openai_clients.clear()
+        self._models.clear()
+
+
+@functools.cache
+def _timed_litellm_model() -> type:
+    # LiteLLM is optional, only subclass it once a provider/model name asks for it
+    from agents.extensions.models.litellm_model import LitellmModel
+
+    class TimedLitellmModel(LitellmModel):
+        """LitellmModel that sends its timeout with every call instead of setting litellm.request_timeout"""
+
+        def __init__(self, model: str, base_url=None, api_key=None, timeout: Optional[float] = None):
+            super().__init__(model=model, base_url=base_url, api_key=api_key)
+            self.timeout = timeout
+
+        def _settings(self, model_settings: ModelSettings) -> ModelSettings:
+            # extra_args are merged, the agent's own win
+            return ModelSettings(extra_args={"timeout": self.timeout}).resolve(model_settings)
+
+        async def get_response(self, system_instructions, input, model_settings, *args, **kwargs):
+            return await super().get_response(system_instructions, input, self._settings(model_settings), *args, **kwargs)
+
+        def stream_response(self, system_instructions, input, model_settings, *args, **kwargs):
+            return super().stream_response(system_instructions, input, self._settings(model_settings), *args, **kwargs)
+
+    return TimedLitellmModel
+
+
+registry = ModelRegistry()
+
+
+def get_model(name: str, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Model:
+    return registry.get(name, api_key=api_key, base_url=base_url)
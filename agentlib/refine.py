@@ -0,0 +1,151 @@
+"""
+Generate / evaluate loop (LLM as a judge) with a budget.
+
+Every round the generator writes a candidate and the judge scores it. Neither
+agent keeps a growing session: both see only the task, the latest candidate
+and a short digest of the feedback so far, so each round costs about the same.
+
+The loop stops when the judge passes the candidate, after max_rounds, or
+when the token budget is spent.
+
+The judge's output type must have `score` and `feedback` fields. Put `score`
+first: the judge is streamed, and as soon as a passing score shows up in the
+JSON the run is cancelled instead of waiting for the feedback text. Only a
+pass stops the judge early, a failing verdict still needs its feedback for the
+next round, so in practice this saves part of the last round. A cancelled
+stream reports no usage, so the tokens of an early-stopped judge round are
+estimated locally.
+
+    result = await refine(generator, judge, "a story about a cat")
+    print(result.candidate, result.stats)
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from agents import Agent, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from .tokens import count_tokens
+
+_SCORE_RE = re.compile(r'"score"\s*:\s*"([^"]+)"')
+
+
+@dataclass
+class RefineStats:
+    rounds: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    wall_time: float = 0.0
+    judge_stopped_early: int = 0
+    stopped_because: str = ""
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+@dataclass
+class RefineResult:
+    candidate: Optional[str]
+    evaluation: Any
+    passed: bool
+    stats: RefineStats
+    feedback: list[str] = field(default_factory=list)
+
+
+def feedback_digest(feedback: list[str], keep: int = 3, max_chars: int = 400) -> str:
+    """The last `keep` pieces of feedback, each cut to max_chars"""
+    recent = feedback[-keep:]
+    lines = []
+    for i, text in enumerate(recent, start=len(feedback) - len(recent) + 1):
+        text = text.strip()
+        if len(text) > max_chars:
+            text = text[:max_chars].rstrip() + "…"
+        lines.append(f"- Round {i}: {text}")
+    return "\n".join(lines)
+
+
+def _add_usage(stats: RefineStats, result):
+    usage = result.context_wrapper.usage
+    stats.input_tokens += usage.input_tokens
+    stats.output_tokens += usage.output_tokens
+
+
+async def _judge(judge: Agent, prompt: str, pass_score: str, stats: RefineStats):
+    result = Runner.run_streamed(judge, prompt)
+    text = ""
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            text += event.data.delta
+            match = _SCORE_RE.search(text)
+            if match and match.group(1) == pass_score:
+                # The verdict is in, the feedback that follows won't change it
+                result.cancel()
+                async for _ in result.stream_events():
+                    pass
+                stats.judge_stopped_early += 1
+                if result.context_wrapper.usage.requests:
+                    _add_usage(stats, result)
+                else:
+                    instructions = judge.instructions if isinstance(judge.instructions, str) else ""
+                    stats.input_tokens += count_tokens(instructions) + count_tokens(prompt)
+                    stats.output_tokens += count_tokens(text)
+                return judge.output_type(score=pass_score, feedback="")
+    _add_usage(stats, result)
+    return result.final_output
+
+
+async def refine(
+    generator: Agent,
+    judge: Agent,
+    task: str,
+    max_rounds: int = 8,
+    max_tokens: Optional[int] = None,
+    pass_score: str = "pass",
+    digest_size: int = 3,
+) -> RefineResult:
+    """
+    :param max_rounds: generate/evaluate rounds at most
+    :param max_tokens: stop once the rounds used this many tokens (input + output)
+    :param pass_score: judge score that ends the loop
+    :param digest_size: how many pieces of feedback the agents see
+    """
+    stats = RefineStats()
+    start = time.perf_counter()
+    feedback: list[str] = []
+    candidate: Optional[str] = None
+    evaluation = None
+    passed = False
+
+    while True:
+        if stats.rounds >= max_rounds:
+            stats.stopped_because = "max_rounds"
+            break
+        if max_tokens is not None and stats.total_tokens >= max_tokens:
+            stats.stopped_because = "token budget"
+            break
+        stats.rounds += 1
+
+        prompt = f"Task: {task}"
+        if candidate is not None:
+            prompt += f"\n\nPrevious version:\n{candidate}\n\nFeedback:\n{feedback_digest(feedback, digest_size)}"
+        generated = await Runner.run(generator, prompt)
+        _add_usage(stats, generated)
+        candidate = str(generated.final_output)
+
+        judge_prompt = f"Task: {task}\n\nAttempt {stats.rounds}:\n{candidate}"
+        if feedback:
+            judge_prompt += f"\n\nYour earlier feedback:\n{feedback_digest(feedback, digest_size)}"
+        evaluation = await _judge(judge, judge_prompt, pass_score, stats)
+
+        if evaluation.score == pass_score:
+            passed = True
+            stats.stopped_because = "passed"
+            break
+        feedback.append(evaluation.feedback)
+
+    stats.wall_time = time.perf_counter() - start
+    return RefineResult(candidate=candidate, evaluation=evaluation, passed=passed, stats=stats, feedback=feedback)
@@ -0,0 +1,273 @@
+"""
+Model response cache.
+
+CachingModel wraps a Model and returns a stored ModelResponse when it sees the
+exact same request again. The key combines the agent name, the system
+instructions, the model name, the model settings, the tools, handoffs and
+output schemas, the prompt and the input items, so changing any of them is
+a miss.
+
+Two backends:
+
+- MemoryCache: in-process LRU with a TTL
+- DiskCache: SQLite file with a TTL and a size limit, survives restarts
+
+Only deterministic requests are cached: temperature set to 0 explicitly,
+and top_p unset or 1. Without a temperature the provider default (about 1)
+applies, so those requests go to the model unless the caller opts in with
+should_cache=cache_always. AGENT_CACHE=off turns caching off entirely.
+Streaming calls are passed through.
+
+    agent = cached(agent, DiskCache(".agent_cache.db"))
+    result = await Runner.run(agent, "...")
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from agents import Agent, ModelSettings
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.models.multi_provider import MultiProvider
+
+
+def is_deterministic(settings: ModelSettings) -> bool:
+    # None means the provider default, which samples
+    if settings.temperature != 0:
+        return False
+    if settings.top_p not in (None, 1):
+        return False
+    return True
+
+
+def cache_always(settings: ModelSettings) -> bool:
+    """Opt in to caching sampled requests too, e.g. to replay a demo while developing"""
+    return True
+
+
+def _settings_dict(settings: ModelSettings) -> dict:
+    if hasattr(settings, "to_json_dict"):
+        return settings.to_json_dict()
+    return dataclasses.asdict(settings)
+
+
+def _tool_dict(tool: Any) -> Any:
+    if hasattr(tool, "params_json_schema"):
+        return {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.params_json_schema,
+            "strict": getattr(tool, "strict_json_schema", None),
+        }
+    if dataclasses.is_dataclass(tool):
+        return {"type": type(tool).__name__, "config": repr(tool)}
+    return repr(tool)
+
+
+def cache_key(
+    agent_name: str,
+    model_name: str,
+    system_instructions: Optional[str],
+    input: Any,
+    model_settings: ModelSettings,
+    tools: list,
+    output_schema: Any,
+    handoffs: list,
+    prompt: Any = None,
+) -> str:
+    payload = {
+        "agent": agent_name,
+        "model": model_name,
+        "instructions": system_instructions,
+        "input": input,
+        "settings": _settings_dict(model_settings),
+        "tools": [_tool_dict(tool) for tool in tools],
+        "output_schema": output_schema.json_schema() if output_schema and not output_schema.is_plain_text() else None,
+        "handoffs": [
+            {"name": handoff.tool_name, "parameters": handoff.input_json_schema} for handoff in handoffs
+        ],
+        "prompt": prompt,
+    }
+    data = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, ModelResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, response = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: ModelResponse):
+        with self._lock:
+            self._entries[key] = (time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    def __init__(self, db_path: str = ".agent_cache.db", ttl: Optional[float] = 7 * 24 * 3600, max_bytes: int = 256 * 2**20):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS model_responses (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_model_responses_accessed_at ON model_responses (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM model_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM model_responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE model_responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key: str, response: ModelResponse):
+        value = pickle.dumps(response)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM model_responses WHERE created_at < ?", (now - self.ttl,))
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM model_responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used entries until we are under the limit
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM model_responses ORDER BY accessed_at"
+        ).fetchall():
+            self._conn.execute("DELETE FROM model_responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM model_responses").fetchone()[0]
+
+
+class CachingModel(Model):
+    def __init__(
+        self,
+        model: Model,
+        cache: MemoryCache | DiskCache,
+        agent_name: str = "",
+        should_cache: Callable[[ModelSettings], bool] = is_deterministic,
+    ):
+        self.model = model
+        self.cache = cache
+        self.agent_name = agent_name
+        self.should_cache = should_cache
+        self.model_name = str(getattr(model, "model", type(model).__name__))
+        self.hits = 0
+        self.misses = 0
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ) -> ModelResponse:
+        use_cache = (
+            os.environ.get("AGENT_CACHE", "on") != "off"
+            and self.should_cache(model_settings)
+            # Server side state means the input alone doesn't describe the request
+            and not kwargs.get("previous_response_id")
+            and not kwargs.get("conversation_id")
+        )
+        if not use_cache:
+            return await self.model.get_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+            )
+
+        key = cache_key(
+            self.agent_name,
+            self.model_name,
+            system_instructions,
+            input,
+            model_settings,
+            tools,
+            output_schema,
+            handoffs,
+            kwargs.get("prompt"),
+        )
+        response = self.cache.get(key)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        self.misses += 1
+        response = await self.model.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+        self.cache.set(key, response)
+        return response
+
+    def stream_response(self, *args, **kwargs):
+        return self.model.stream_response(*args, **kwargs)
+
+
+def cached(agent: Agent, cache: MemoryCache | DiskCache, **kwargs) -> Agent:
+    """Copy of agent whose model calls go through cache"""
+    model = agent.model
+    if not isinstance(model, Model):
+        model = MultiProvider().get_model(model)
+    return agent.clone(model=CachingModel(model, cache, agent_name=agent.name, **kwargs))
@@ -0,0 +1,173 @@
+"""
+Streaming a run to a browser as server-sent events.
+
+Sending one frame per token means one json.dumps, one write and one network
+packet per token, and a client that stops reading (a closed tab) leaves the
+model stream running until the answer is done. stream_events_sse() sends the
+events of a Runner.run_streamed result with
+
+- token deltas coalesced into one frame per `max_delay` seconds or
+  `max_chars` characters, whichever comes first
+- frames built from pre-encoded bytes, only the text itself is JSON-escaped
+- a bounded per-connection buffer: while a slow client has `max_frames`
+  frames waiting, new tokens are merged into the last waiting frame instead
+  of queueing more
+- the run cancelled as soon as the client disconnects
+
+    result = Runner.run_streamed(agent, input=message)
+    return StreamingResponse(stream_events_sse(result, request), media_type="text/event-stream")
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from agents import ItemHelpers, RunResultStreaming
+from openai.types.responses import ResponseTextDeltaEvent
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+
+def frame(payload: dict) -> bytes:
+    return b"data: " + json.dumps(payload).encode() + b"\n\n"
+
+
+START_FRAME = frame({"type": "start", "message": "Starting chat..."})
+COMPLETE_FRAME = frame({"type": "complete"})
+TOOL_CALL_FRAME = frame({"type": "tool_call", "message": "Tool was called"})
+_TOKEN_PREFIX = b'data: {"type": "token", "content": '
+_FRAME_END = b"}\n\n"
+
+
+def token_frame(text: str) -> bytes:
+    return _TOKEN_PREFIX + json.dumps(text).encode() + _FRAME_END
+
+
+class FrameBuffer:
+    """Frames waiting to be sent to one client, with pending token text merged"""
+
+    def __init__(self, max_frames: int = 32):
+        self.max_frames = max_frames
+        # bytes for ready frames, list[str] for token text still being collected
+        self._frames: deque = deque()
+        self._first_token_at: Optional[float] = None
+        self._pending_chars = 0
+        self._changed = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self.closed = False
+
+    def add_token(self, text: str):
+        if self._frames and isinstance(self._frames[-1], list):
+            self._frames[-1].append(text)
+        else:
+            self._frames.append([text])
+        if self._first_token_at is None:
+            self._first_token_at = time.monotonic()
+        self._pending_chars += len(text)
+        self._changed.set()
+
+    async def add_frame(self, data: bytes):
+        while len(self._frames) >= self.max_frames and not self.closed:
+            self._space.clear()
+            await self._space.wait()
+        self._frames.append(data)
+        self._changed.set()
+
+    def close(self):
+        self.closed = True
+        self._changed.set()
+        self._space.set()
+
+    async def frames(self, max_delay: float, max_chars: int) -> AsyncIterator[bytes]:
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            only_tokens = len(self._frames) == 1 and isinstance(self._frames[0], list)
+            if only_tokens and not self.closed and self._pending_chars < max_chars and self._first_token_at:
+                # Give more tokens a chance to join this frame
+                delay = max_delay - (time.monotonic() - self._first_token_at)
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wait_for_chars(max_chars), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            while self._frames:
+                item = self._frames.popleft()
+                if isinstance(item, list):
+                    item = token_frame("".join(item))
+                    self._first_token_at = None
+                    self._pending_chars = 0
+                self._space.set()
+                yield item
+            if self.closed:
+                return
+
+    async def _wait_for_chars(self, max_chars: int):
+        while self._pending_chars < max_chars and not self.closed and len(self._frames) == 1:
+            self._changed.clear()
+            await self._changed.wait()
+        # Whatever woke us up still needs handling by frames()
+        self._changed.set()
+
+
+async def _produce(result: RunResultStreaming, buffer: FrameBuffer):
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                if isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
+                    buffer.add_token(event.data.delta)
+            elif event.type == "agent_updated_stream_event":
+                await buffer.add_frame(frame({"type": "agent_update", "agent_name": event.new_agent.name}))
+            elif event.type == "run_item_stream_event":
+                if event.item.type == "tool_call_item":
+                    await buffer.add_frame(TOOL_CALL_FRAME)
+                elif event.item.type == "tool_call_output_item":
+                    await buffer.add_frame(frame({"type": "tool_output", "content": str(event.item.output)}))
+                elif event.item.type == "message_output_item":
+                    text = ItemHelpers.text_message_output(event.item)
+                    await buffer.add_frame(frame({"type": "message", "content": text}))
+        await buffer.add_frame(COMPLETE_FRAME)
+    except Exception:
+        logger.exception("Streamed run failed")
+        await buffer.add_frame(frame({"type": "error", "message": "The run failed"}))
+    finally:
+        buffer.close()
+
+
+async def _watch_disconnect(request: Request, result: RunResultStreaming, interval: float):
+    while not result.is_complete:
+        if await request.is_disconnected():
+            logger.info("Client went away, cancelling the run")
+            result.cancel()
+            return
+        await asyncio.sleep(interval)
+
+
+async def stream_events_sse(
+    result: RunResultStreaming,
+    request: Optional[Request] = None,
+    max_delay: float = 0.05,
+    max_chars: int = 256,
+    max_frames: int = 32,
+    disconnect_poll: float = 0.5,
+) -> AsyncIterator[bytes]:
+    """SSE frames for a streamed run, see the module docstring"""
+    buffer = FrameBuffer(max_frames)
+    producer = asyncio.create_task(_produce(result, buffer))
+    watcher = asyncio.create_task(_watch_disconnect(request, result, disconnect_poll)) if request else None
+    try:
+        yield START_FRAME
+        async for data in buffer.frames(max_delay, max_chars):
+            yield data
+    finally:
+        # Also reached when the server stops the response because the client is gone
+        if not result.is_complete:
+            result.cancel()
+        for task in (producer, watcher):
+            if task is not None and not task.done():
+                task.cancel()
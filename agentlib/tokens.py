@@ -0,0 +1,53 @@
+"""
+Local token estimates.
+
+Uses tiktoken when it is installed and its encoding can be loaded, and
+falls back to ~4 characters per token otherwise. tiktoken downloads an
+encoding the first time it is used; if that fails (offline, blocked) the
+estimate is used for the rest of the process, no other request is made.
+"""
+
+import json
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    """The tiktoken encoding, or None when it isn't available"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("Could not load the %s encoding (%s), estimating tokens from length", name, e)
+        return None
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    if not text:
+        return 0
+    enc = _encoding(encoding)
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def item_tokens(item) -> int:
+    """Estimate the tokens an input item (message, tool call, tool output...) costs"""
+    if isinstance(item, str):
+        return count_tokens(item)
+    content = item.get("content") if isinstance(item, dict) else None
+    if isinstance(content, str):
+        # Small constant for the role and message framing
+        return count_tokens(content) + 4
+    return count_tokens(json.dumps(item, ensure_ascii=False, default=str)) + 4
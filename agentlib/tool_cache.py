@@ -0,0 +1,194 @@
+"""
+Memoization for idempotent function tools.
+
+Agents that "verify every action" call the same tool with the same arguments
+again and again. memoize() caches the result by tool name plus the
+canonicalized arguments (the run context is left out), with:
+
+- a TTL
+- a size bounded LRU
+- optional invalidation when files change: `paths` returns the files a call
+  depends on, and an entry is dropped when any of their mtime/size differ
+- hit / miss counters, see cache_stats()
+
+Concurrent calls with the same arguments share one underlying call, counted
+as "coalesced". The shared call runs in its own task, so a caller that is
+cancelled doesn't cancel it for the others.
+
+    @function_tool
+    @memoize(ttl=600, paths=lambda args: [args["filename"]])
+    def read_file(filename: str) -> str:
+        ...
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from agents import RunContextWrapper
+
+_MISSING = object()
+
+caches: dict[str, "ToolCache"] = {}
+
+
+def _file_state(path: str) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class _Entry:
+    value: Any
+    created: float
+    files: dict[str, Optional[tuple[int, int]]]
+
+
+class ToolCache:
+    def __init__(self, name: str, ttl: Optional[float] = None, max_entries: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            stale = self.ttl is not None and time.monotonic() - entry.created > self.ttl
+            changed = any(_file_state(path) != state for path, state in entry.files.items())
+            if stale or changed:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, files: dict[str, Optional[tuple[int, int]]]):
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic(), files)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            # Calls that didn't run the tool, waiting on a shared call included
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+        }
+
+
+def memoize(
+    ttl: Optional[float] = 300,
+    max_entries: int = 256,
+    paths: Optional[Callable[[dict], list[str]]] = None,
+    name: Optional[str] = None,
+) -> Callable:
+    """Decorator for tool functions, put it under @function_tool"""
+
+    def decorator(fn: Callable) -> Callable:
+        cache = ToolCache(name or fn.__name__, ttl=ttl, max_entries=max_entries)
+        caches[cache.name] = cache
+        signature = inspect.signature(fn)
+        in_flight: dict[str, asyncio.Task] = {}
+
+        def arguments(args, kwargs) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return {
+                key: value
+                for key, value in bound.arguments.items()
+                if not isinstance(value, RunContextWrapper)
+            }
+
+        def make_key(args_dict: dict) -> str:
+            return cache.name + ":" + json.dumps(args_dict, sort_keys=True, default=str, ensure_ascii=False)
+
+        def watched(args_dict: dict) -> dict:
+            # Taken before the call, so a change while the tool runs invalidates the entry
+            return {path: _file_state(path) for path in paths(args_dict)} if paths else {}
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                args_dict = arguments(args, kwargs)
+                key = make_key(args_dict)
+                task = in_flight.get(key)
+                if task is not None:
+                    cache.count_coalesced()
+                    return await asyncio.shield(task)
+                value = cache.get(key)
+                if value is not _MISSING:
+                    return value
+
+                async def call():
+                    try:
+                        files = watched(args_dict)
+                        value = await fn(*args, **kwargs)
+                        cache.set(key, value, files)
+                        return value
+                    finally:
+                        del in_flight[key]
+
+                task = in_flight[key] = asyncio.create_task(call())
+                # Every caller may have been cancelled; don't warn about an unretrieved exception
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return await asyncio.shield(task)
+
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            args_dict = arguments(args, kwargs)
+            key = make_key(args_dict)
+            value = cache.get(key)
+            if value is not _MISSING:
+                return value
+            files = watched(args_dict)
+            value = fn(*args, **kwargs)
+            cache.set(key, value, files)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict[str, dict]:
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,91 @@
+"""
+Running function tools without blocking the event loop.
+
+The SDK already runs the tool calls of one model turn concurrently, as long as
+the tools are async and don't block. `pooled` makes that true for any tool:
+
+- sync tools run on a dedicated, sized thread pool (not the loop's default
+  executor, which is shared with everything else)
+- every call gets an optional timeout and a per-tool concurrency limit
+
+HTTP tools should use http_client(), one keep-alive httpx.AsyncClient per
+event loop, instead of requests in a thread.
+
+    @function_tool
+    @pooled(timeout=10, max_concurrency=4)
+    def read_file(path: str) -> str:
+        ...
+
+Ask the model for parallel calls too: ModelSettings(parallel_tool_calls=True).
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import httpx
+
+_executor: Optional[ThreadPoolExecutor] = None
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def tool_executor() -> ThreadPoolExecutor:
+    """Thread pool for sync tools, sized by AGENT_TOOL_THREADS"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("AGENT_TOOL_THREADS", 16)),
+            thread_name_prefix="agent-tool",
+        )
+    return _executor
+
+
+def http_client() -> httpx.AsyncClient:
+    """Shared httpx client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.environ.get("AGENT_TOOL_HTTP_TIMEOUT", 15))),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return client
+
+
+def pooled(
+    timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Callable:
+    """Decorator for tool functions, put it under @function_tool"""
+
+    def decorator(fn: Callable) -> Callable:
+        is_async = inspect.iscoroutinefunction(fn)
+        # One limit per event loop, created on first use: a semaphore made at
+        # decoration time would be bound to whichever loop used it first
+        semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+        async def call(*args, **kwargs):
+            if is_async:
+                return await fn(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor or tool_executor(), functools.partial(fn, *args, **kwargs))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not max_concurrency:
+                return await asyncio.wait_for(call(*args, **kwargs), timeout)
+            loop = asyncio.get_running_loop()
+            semaphore = semaphores.get(loop)
+            if semaphore is None:
+                semaphore = semaphores[loop] = asyncio.Semaphore(max_concurrency)
+            async with semaphore:
+                return await asyncio.wait_for(call(*args, **kwargs), timeout)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,239 @@
+"""
+Expose only the tools a turn needs.
+
+Every tool the agent has (function tools and every tool of every MCP server)
+is sent with each request as a JSON schema. With a few MCP servers attached
+that's most of the input tokens. ToolRouter keeps a local BM25 keyword index
+over tool names, descriptions and parameter names, picks the top k tools for
+the user's message and runs the turn with an agent that only has those.
+
+If nothing in the message matches any tool, all tools are exposed, so a bad
+route can cost tokens but never takes a needed tool away silently.
+
+    router = ToolRouter(k=3)
+    routed = await router.route(agent, question)
+    result = await Runner.run(routed, question)
+    print(router.stats)
+
+evaluate() measures selection accuracy (recall@k) on labeled queries.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from agents import Agent, FunctionTool
+from agents.mcp import MCPServer
+
+from .tokens import count_tokens
+
+# Acronyms stay whole: "fetchURL" -> fetch URL, "HTTPGet" -> HTTP Get
+_WORD_RE = re.compile(r"[A-Z]+s?(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "the", "this", "to", "what", "with", "you", "your",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Words of text, with snake_case and camelCase split, lowercased and lightly stemmed"""
+    words = (word.lower() for word in _WORD_RE.findall(text or ""))
+    return [_stem(word) for word in words if word not in STOPWORDS]
+
+
+@dataclass
+class ToolDoc:
+    name: str
+    description: str
+    schema: dict
+    server: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        params = " ".join((self.schema or {}).get("properties", {}).keys())
+        # The name counts twice, it is usually the best summary of the tool
+        return f"{self.name} {self.name} {self.description} {params}"
+
+    @property
+    def schema_tokens(self) -> int:
+        return count_tokens(json.dumps({"name": self.name, "description": self.description, "parameters": self.schema}))
+
+
+class BM25Index:
+    def __init__(self, docs: list[ToolDoc], k1: float = 1.2, b: float = 0.75):
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(doc.text)) for doc in docs]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = sum(self._lengths) / len(docs) if docs else 0
+        df = Counter(term for terms in self._terms for term in terms)
+        n = len(docs)
+        self._idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def scores(self, query: str) -> list[float]:
+        query_terms = set(tokenize(query))
+        scores = []
+        for terms, length in zip(self._terms, self._lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term)
+                if not tf:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+                score += self._idf[term] * tf * (self.k1 + 1) / norm
+            scores.append(score)
+        return scores
+
+
+@dataclass
+class RouterStats:
+    turns: int = 0
+    fallbacks: int = 0
+    schema_tokens_all: int = 0
+    schema_tokens_sent: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.schema_tokens_all - self.schema_tokens_sent
+
+    @property
+    def savings(self) -> float:
+        return self.saved_tokens / self.schema_tokens_all if self.schema_tokens_all else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.turns} turns, {self.fallbacks} fell back to all tools, "
+            f"tool schema tokens {self.schema_tokens_sent}/{self.schema_tokens_all} "
+            f"({self.savings:.0%} saved)"
+        )
+
+
+class FilteredServer(MCPServer):
+    """An MCP server that only lists some of its tools"""
+
+    def __init__(self, server: MCPServer, allowed: set[str]):
+        # No MCPServer.__init__: it would set use_structured_content on the
+        # wrapper and hide the wrapped server's value from __getattr__
+        self.server = server
+        self.allowed = allowed
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "server":
+            raise AttributeError(name)
+        return getattr(self.server, name)
+
+    @property
+    def name(self) -> str:
+        return self.server.name
+
+    async def connect(self):
+        await self.server.connect()
+
+    async def cleanup(self):
+        # The wrapped server is shared, whoever connected it cleans it up
+        pass
+
+    async def list_tools(self, *args, **kwargs):
+        tools = await self.server.list_tools(*args, **kwargs)
+        return [tool for tool in tools if tool.name in self.allowed]
+
+    async def call_tool(self, *args, **kwargs):
+        return await self.server.call_tool(*args, **kwargs)
+
+    async def list_prompts(self, *args, **kwargs):
+        return await self.server.list_prompts(*args, **kwargs)
+
+    async def get_prompt(self, *args, **kwargs):
+        return await self.server.get_prompt(*args, **kwargs)
+
+
+class ToolRouter:
+    def __init__(self, k: int = 3, always: tuple[str, ...] = ()):
+        """
+        :param k: tools exposed per turn (plus `always`)
+        :param always: tool names exposed on every turn
+        """
+        self.k = k
+        self.always = set(always)
+        self.stats = RouterStats()
+        # Agent name -> (tool set, index), only the latest tool set of each agent
+        self._index_cache: dict[str, tuple[tuple, BM25Index]] = {}
+
+    async def tool_docs(self, agent: Agent) -> list[ToolDoc]:
+        docs = [
+            ToolDoc(tool.name, tool.description, tool.params_json_schema)
+            for tool in agent.tools
+            if isinstance(tool, FunctionTool)
+        ]
+        for server in agent.mcp_servers:
+            for tool in await server.list_tools():
+                docs.append(ToolDoc(tool.name, tool.description or "", tool.inputSchema, server.name))
+        return docs
+
+    async def index(self, agent: Agent) -> BM25Index:
+        docs = await self.tool_docs(agent)
+        key = tuple((doc.server, doc.name, doc.description) for doc in docs)
+        cached = self._index_cache.get(agent.name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        index = BM25Index(docs)
+        self._index_cache[agent.name] = (key, index)
+        return index
+
+    async def select(self, agent: Agent, query: str) -> tuple[list[ToolDoc], list[ToolDoc], bool]:
+        """(selected tools, all tools, whether it fell back to all tools) for the query"""
+        index = await self.index(agent)
+        scores = index.scores(query)
+        ranked = sorted(range(len(index.docs)), key=lambda i: scores[i], reverse=True)
+        selected = [index.docs[i] for i in ranked[: self.k] if scores[i] > 0]
+        if not selected:
+            return list(index.docs), index.docs, True
+        selected += [doc for doc in index.docs if doc.name in self.always and doc not in selected]
+        return selected, index.docs, False
+
+    async def route(self, agent: Agent, query: str) -> Agent:
+        """A copy of agent that only has the tools relevant to query"""
+        selected, docs, fallback = await self.select(agent, query)
+        self.stats.turns += 1
+        if fallback:
+            self.stats.fallbacks += 1
+        self.stats.schema_tokens_all += sum(doc.schema_tokens for doc in docs)
+        self.stats.schema_tokens_sent += sum(doc.schema_tokens for doc in selected)
+
+        function_names = {doc.name for doc in selected if doc.server is None}
+        mcp_names: dict[str, set[str]] = {}
+        for doc in selected:
+            if doc.server is not None:
+                mcp_names.setdefault(doc.server, set()).add(doc.name)
+
+        return agent.clone(
+            tools=[tool for tool in agent.tools if not isinstance(tool, FunctionTool) or tool.name in function_names],
+            mcp_servers=[
+                FilteredServer(server, mcp_names[server.name])
+                for server in agent.mcp_servers
+                if server.name in mcp_names
+            ],
+        )
+
+
+async def evaluate(router: ToolRouter, agent: Agent, labeled: list[tuple[str, str]]) -> float:
+    """Share of (query, expected tool name) pairs where the expected tool was selected"""
+    if not labeled:
+        return 0.0
+    hits = 0
+    for query, expected in labeled:
+        selected, _, _ = await router.select(agent, query)
+        hits += any(doc.name == expected for doc in selected)
+    return hits / len(labeled)
@@ -0,0 +1,403 @@
+"""
+Sampled, batched tracing.
+
+The default way of adding a tracing processor exports every span, often
+synchronously on the request path. SamplingProcessor keeps the hot path to a
+dict lookup and a list append:
+
+- head sampling: a fixed share of traces (decided from the trace id, so every
+  process agrees) is always kept
+- tail sampling: any other trace is held until it ends, and kept only if a
+  span failed or the trace was slower than `slow_after` seconds
+- kept traces go to a bounded ring buffer. When it's full the oldest trace is
+  dropped and counted, the run is never slowed down
+- a background thread hands the buffer to an exporter in batches
+
+Exporters: JsonlExporter (a local file), OTLPExporter (OTLP/HTTP JSON, e.g. a
+collector on :4318) and ProcessorExporter, which replays kept traces into
+another tracing processor such as LangSmith's.
+
+    set_trace_processors([SamplingProcessor(JsonlExporter("traces.jsonl"), head_rate=0.1)])
+
+`python -m agentlib.tracing collector` runs a stub OTLP collector that counts
+what it receives.
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from agents.tracing import Span, Trace, TracingProcessor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TraceRecord:
+    trace: Trace
+    spans: list[Span] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    duration: float = 0.0
+    sampled_by: str = "head"
+    failed: bool = False
+    # Spans over max_spans_per_trace that were not kept
+    truncated: int = 0
+
+
+class Exporter(abc.ABC):
+    @abc.abstractmethod
+    def export(self, records: list[TraceRecord]) -> None:
+        """Called from the export thread with a batch of finished traces"""
+
+    def shutdown(self) -> None:
+        pass
+
+
+@dataclass
+class TracingStats:
+    traces: int = 0
+    head_sampled: int = 0
+    tail_sampled: int = 0
+    discarded: int = 0
+    dropped_buffer_full: int = 0
+    dropped_pending: int = 0
+    dropped_spans: int = 0
+    exported: int = 0
+    export_errors: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.traces} traces, kept {self.head_sampled} head + {self.tail_sampled} tail sampled, "
+            f"discarded {self.discarded}, exported {self.exported}, dropped {self.dropped_buffer_full} "
+            f"(buffer full) + {self.dropped_pending} (too many open traces), {self.dropped_spans} spans, "
+            f"{self.export_errors} export errors"
+        )
+
+
+def _head_sampled(trace_id: str, rate: float) -> bool:
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    digest = hashlib.blake2b(trace_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+
+class SamplingProcessor(TracingProcessor):
+    def __init__(
+        self,
+        exporter: Exporter,
+        head_rate: float = 0.1,
+        tail: bool = True,
+        slow_after: float = 10.0,
+        buffer_size: int = 1024,
+        batch_size: int = 64,
+        export_interval: float = 5.0,
+        max_pending: int = 1024,
+        max_spans_per_trace: int = 1000,
+    ):
+        """
+        :param head_rate: share of traces always kept
+        :param tail: keep failed or slow traces among the rest
+        :param slow_after: seconds after which a trace counts as slow
+        :param buffer_size: finished traces waiting for export, the oldest is dropped beyond that
+        :param batch_size: traces per export call, a full batch wakes the export thread
+        :param export_interval: seconds between exports when traffic is low
+        :param max_pending: traces in progress that are tracked, newer ones are not
+        """
+        self.exporter = exporter
+        self.head_rate = head_rate
+        self.tail = tail
+        self.slow_after = slow_after
+        self.batch_size = batch_size
+        self.export_interval = export_interval
+        self.max_pending = max_pending
+        self.max_spans_per_trace = max_spans_per_trace
+        self.stats = TracingStats()
+        self._pending: dict[str, TraceRecord] = {}
+        self._buffer: deque[TraceRecord] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+            self._thread.start()
+
+    def on_trace_start(self, trace: Trace) -> None:
+        with self._lock:
+            self.stats.traces += 1
+            head = _head_sampled(trace.trace_id, self.head_rate)
+            if not head and not self.tail:
+                self.stats.discarded += 1
+                return
+            if len(self._pending) >= self.max_pending:
+                self.stats.dropped_pending += 1
+                return
+            self._pending[trace.trace_id] = TraceRecord(trace, sampled_by="head" if head else "tail")
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        with self._lock:
+            record = self._pending.get(span.trace_id)
+            if record is None:
+                return
+            if span.error is not None:
+                record.failed = True
+            if len(record.spans) >= self.max_spans_per_trace:
+                record.truncated += 1
+                self.stats.dropped_spans += 1
+                return
+            record.spans.append(span)
+
+    def on_trace_end(self, trace: Trace) -> None:
+        with self._lock:
+            record = self._pending.pop(trace.trace_id, None)
+            if record is None:
+                return
+            record.duration = time.monotonic() - record.started
+            if record.sampled_by == "head":
+                self.stats.head_sampled += 1
+            elif record.failed or record.duration >= self.slow_after:
+                self.stats.tail_sampled += 1
+            else:
+                self.stats.discarded += 1
+                return
+            if len(self._buffer) == self._buffer.maxlen:
+                self.stats.dropped_buffer_full += 1
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def _take(self) -> list[TraceRecord]:
+        with self._lock:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        return batch
+
+    def _export_all(self):
+        with self._export_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return
+                try:
+                    self.exporter.export(batch)
+                    self.stats.exported += len(batch)
+                except Exception:
+                    self.stats.export_errors += 1
+                    logger.exception("Exporting %d traces failed", len(batch))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.export_interval)
+            self._wake.clear()
+            self._export_all()
+
+    def force_flush(self) -> None:
+        self._export_all()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._export_all()
+        self.exporter.shutdown()
+
+
+def _record_dict(record: TraceRecord) -> dict:
+    return {
+        "trace": record.trace.export(),
+        "duration": record.duration,
+        "sampled_by": record.sampled_by,
+        "failed": record.failed,
+        "truncated": record.truncated,
+        "spans": [span.export() for span in record.spans],
+    }
+
+
+class JsonlExporter(Exporter):
+    """One JSON line per trace"""
+
+    def __init__(self, path: str = "traces.jsonl"):
+        self.path = path
+        self._file = open(path, "a", encoding="utf8")
+
+    def export(self, records: list[TraceRecord]) -> None:
+        self._file.write("".join(json.dumps(_record_dict(record), default=str) + "\n" for record in records))
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+def _hex_id(sdk_id: Optional[str], length: int) -> str:
+    # SDK ids look like trace_<32 hex> and span_<24 hex>, OTLP wants 32 and 16 hex digits
+    digits = (sdk_id or "").rpartition("_")[2]
+    if len(digits) < length or any(c not in "0123456789abcdef" for c in digits.lower()):
+        return hashlib.blake2b((sdk_id or "").encode(), digest_size=length // 2).hexdigest()
+    return digits[-length:].lower()
+
+
+def _nanos(timestamp: Optional[str]) -> str:
+    if not timestamp:
+        return "0"
+    return str(int(datetime.fromisoformat(timestamp).timestamp() * 1e9))
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    return {"key": key, "value": {"stringValue": value}}
+
+
+def otlp_payload(records: list[TraceRecord], service_name: str = "agents") -> dict:
+    """OTLP/JSON ExportTraceServiceRequest for a batch of traces"""
+    spans = []
+    for record in records:
+        trace_id = _hex_id(record.trace.trace_id, 32)
+        for span in record.spans:
+            data = span.span_data.export()
+            span_type = data.pop("type", "span")
+            otlp_span = {
+                "traceId": trace_id,
+                "spanId": _hex_id(span.span_id, 16),
+                "name": f"{span_type} {data['name']}" if data.get("name") else span_type,
+                "kind": 1,
+                "startTimeUnixNano": _nanos(span.started_at),
+                "endTimeUnixNano": _nanos(span.ended_at),
+                "attributes": [_attribute("agents.workflow", record.trace.name)]
+                + [_attribute(f"agents.{key}", value) for key, value in data.items() if value is not None],
+                "status": {"code": 2, "message": span.error["message"]} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = _hex_id(span.parent_id, 16)
+            spans.append(otlp_span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", service_name)]},
+                "scopeSpans": [{"scope": {"name": "openai-agents"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class OTLPExporter(Exporter):
+    def __init__(self, endpoint: str = "http://localhost:4318/v1/traces", service_name: str = "agents", timeout: float = 10):
+        import httpx
+
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, records: list[TraceRecord]) -> None:
+        response = self._client.post(self.endpoint, json=otlp_payload(records, self.service_name))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class ProcessorExporter(Exporter):
+    """Replays kept traces into another tracing processor.
+
+    Spans are replayed as a tree: a parent is started, its children are
+    replayed, then the parent is ended, the order a live run produces.
+    Processors like LangSmith's look up a span's parent when the span starts.
+    """
+
+    def __init__(self, processor: TracingProcessor):
+        self.processor = processor
+
+    def _replay(self, span: Span, children: dict[Optional[str], list[Span]]):
+        self.processor.on_span_start(span)
+        for child in children.get(span.span_id, []):
+            self._replay(child, children)
+        self.processor.on_span_end(span)
+
+    def export(self, records: list[TraceRecord]) -> None:
+        for record in records:
+            self.processor.on_trace_start(record.trace)
+            span_ids = {span.span_id for span in record.spans}
+            children: dict[Optional[str], list[Span]] = {}
+            for span in sorted(record.spans, key=lambda span: span.started_at or ""):
+                # Spans whose parent wasn't kept are replayed at the top level
+                parent = span.parent_id if span.parent_id in span_ids else None
+                children.setdefault(parent, []).append(span)
+            for span in children.get(None, []):
+                self._replay(span, children)
+            self.processor.on_trace_end(record.trace)
+        self.processor.force_flush()
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+
+def run_collector(port: int = 4318):
+    """A stand-in OTLP/HTTP collector that accepts JSON traces and prints counts"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    received = {"requests": 0, "spans": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            spans = sum(
+                len(scope.get("spans", []))
+                for resource in payload.get("resourceSpans", [])
+                for scope in resource.get("scopeSpans", [])
+            )
+            received["requests"] += 1
+            received["spans"] += spans
+            print(f"{self.path}: {spans} spans ({received['spans']} in {received['requests']} requests)")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"OTLP collector stub on http://127.0.0.1:{port}/v1/traces")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["collector"])
+    parser.add_argument("--port", type=int, default=4318)
+    args = parser.parse_args()
+    run_collector(args.port)
@@ -1,4 +1,7 @@
-from agents import Agent, Runner
+import sys
+from pathlib import Path
+
+from agents import Runner
 from pydantic import BaseModel, Field
 from jinja2 import Environment, FileSystemLoader
 
@@ -6,11 +9,14 @@ class BlogPostIdea(BaseModel):
     title: str = Field(..., title="Title", description="The title of the blog post"),
     main_concepts: list[str] = Field(..., title="Main Concepts", description="Main concepts for the post")
 
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from agentlib.agent_registry import get_agent
+
 env = Environment(loader=FileSystemLoader("agents/researcher"))
 template = env.get_template("instructions.md")
 
-market_research_agent = Agent(
-    name="MarketResearcher",
+market_research_agent = get_agent(
+    "MarketResearcher",
     output_type=list[BlogPostIdea],
     instructions=template.render()
 )
@@ -1,9 +1,18 @@
 import asyncio
-from agents import Agent, Runner
-from agents.extensions.models.litellm_model import LitellmModel
+from agents import Runner
 import os
 from pydantic import BaseModel, Field
 import random
+
+from agentlib.agent_registry import get_agent
+from agentlib.models import get_model
+from agentlib.response_cache import DiskCache, cache_always, cached, is_deterministic
+
+cache = DiskCache()
+# The posts are sampled, so by default nothing here is cached. BLOG_CACHE_SAMPLED=1
+# replays earlier answers anyway, handy for rerunning while developing
+should_cache = cache_always if os.environ.get("BLOG_CACHE_SAMPLED") == "1" else is_deterministic
+
 class BlogPostIdea(BaseModel):
     title: str = Field(..., title="Title", description="The title of the blog post"),
     main_concepts: list[str] = Field(..., title="Main Concepts", description="Main concepts for the post")
@@ -13,27 +22,27 @@ class BlogPost(BaseModel):
     content: str = Field(..., title="Content", description="Actual blog post content in markdown format")
 
 async def main(general_topic: str):
-    market_research_agent = Agent(
-        name="MarketResearcher",
-        model=LitellmModel(model="github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"]),
+    market_research_agent = cached(get_agent(
+        "MarketResearcher",
+        model=get_model("github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"]),
         output_type=list[BlogPostIdea],
         instructions="""
         You are a market researcher and your job is to suggest cool ideas for blog posts.
         I will send you ideas and you will help me turn them into engaging posts,
         Or I will send you topics and you will help to focus me on the best viral ideas in these niches.        
         """
-    )
+    ), cache, should_cache=should_cache)
 
     result = await Runner.run(market_research_agent, f"Create 5 blog posts subject lines and main concept for: {general_topic}")
     selected_idea = random.sample(result.final_output, 1)[0]
 
-    writer = Agent(
-        name="Writer",
-        model=LitellmModel(model="github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"]),
+    writer = cached(get_agent(
+        "Writer",
+        model=get_model("github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"]),
         instructions="""
         You are a copywriter creating engaging and viral blog posts.
         """,
-    )
+    ), cache, should_cache=should_cache)
     post = await Runner.run(writer, f"Create a blog post from the following JSON data: {selected_idea.model_dump()}")
     print(post.final_output)
 
@@ -1,13 +1,18 @@
 import asyncio
+import sys
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Literal
 
-from agents import Agent, Runner, trace, SQLiteSession
+from agents import Agent, trace
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.refine import refine
 
 """
 This example shows the LLM as a judge pattern. The first agent generates an outline for a story.
 The second agent judges the outline and provides feedback. We loop until the judge is satisfied
-with the outline.
+with the outline, or we run out of rounds or tokens.
 """
 
 story_outline_generator = Agent(
@@ -21,8 +26,9 @@ story_outline_generator = Agent(
 
 @dataclass
 class EvaluationFeedback:
-    feedback: str
+    # score comes first so the judge's verdict streams before its feedback
     score: Literal["pass", "needs_improvement", "fail"]
+    feedback: str
 
 
 evaluator = Agent(
@@ -37,39 +43,23 @@ evaluator = Agent(
 
 
 async def main() -> None:
-    writer_session = SQLiteSession("story")
-    judge_session = SQLiteSession("judge")
-
     msg = input("What kind of story would you like to hear? ")
 
-    latest_outline: str | None = None
-
     # We'll run the entire workflow in a single trace
     with trace("LLM as a judge"):
-        while True:
-            story_outline_result = await Runner.run(
-                story_outline_generator,
-                msg,
-                session=writer_session
-            )
-
-            latest_outline = story_outline_result.final_output
-            print("Story outline generated")
-
-            evaluator_result = await Runner.run(evaluator, msg, session=judge_session)
-            result: EvaluationFeedback = evaluator_result.final_output
-
-            print(f"Evaluator score: {result.score}")
-
-            if result.score == "pass":
-                print("Story outline is good enough, exiting.")
-                break
-
-            print("Re-running with feedback")
-            await writer_session.add_items([{"content": f"Feedback: {result.feedback}", "role": "user"}])
+        result = await refine(
+            story_outline_generator,
+            evaluator,
+            msg,
+            max_rounds=8,
+            max_tokens=50_000,
+        )
 
-    print(f"Final story outline: {latest_outline}")
+    stats = result.stats
+    print(f"Stopped after {stats.rounds} rounds ({stats.stopped_because}), "
+          f"{stats.total_tokens} tokens, {stats.wall_time:.1f}s")
+    print(f"Final story outline: {result.candidate}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
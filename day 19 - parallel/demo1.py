@@ -1,10 +1,15 @@
 import asyncio
+import sys
+from pathlib import Path
 
-from agents import Agent, Runner, trace
+from agents import Agent, trace
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.best_of_n import LLMPicker, best_of_n
 
 """
 This example shows the parallelization pattern. We run the agent three times in parallel, and pick
-the best result.
+the best result. If two of the translations agree we take that one and skip the picker.
 """
 
 spanish_agent = Agent(
@@ -31,38 +36,24 @@ async def main():
 
     # Ensure the entire workflow is a single trace
     with trace("Parallel translation"):
-        results = await asyncio.gather(
-            Runner.run(
-                spanish_agent,
-                msg,
-            ),
-            Runner.run(
-                spanish_agent,
-                msg,
-            ),
-            Runner.run(
-                spanish_agent,
-                msg,
-            ),
+        result = await best_of_n(
+            spanish_agent,
+            msg,
+            n=3,
+            timeout=60,
+            quorum=2,
+            agreement=0.9,
+            picker=LLMPicker(translation_picker),
         )
 
-        outputs = [
-            res.final_output
-            for res in results
-        ]
-
-        translations = "\n\n".join(outputs)
+        translations = "\n\n".join(result.samples)
         print(f"\n\nTranslations:\n\n{translations}")
 
-        best_translation = await Runner.run(
-            translation_picker,
-            f"Input: {msg}\n\nTranslations:\n{translations}",
-        )
-
     print("\n\n-----")
 
-    print(f"Best translation: {best_translation.final_output}")
+    print(f"Picked by: {result.picked_by} (cancelled {result.cancelled}, failed {result.failed})")
+    print(f"Best translation: {result.best}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
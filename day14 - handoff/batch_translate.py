@@ -0,0 +1,47 @@
+"""
+Translate a file of strings, one per line, in batches.
+
+    python batch_translate.py french strings.txt
+
+Translations are kept in translations.db, so running it again (after a crash
+or with more strings) only sends what's new.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.batch_translate import BatchStats, TranslationStore, translate_many
+from view_tools import french_agent, spanish_agent
+
+translators = {"french": french_agent, "spanish": spanish_agent}
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("language", choices=sorted(translators))
+    parser.add_argument("file", help="strings to translate, one per line")
+    parser.add_argument("--db", default="translations.db")
+    parser.add_argument("--batch-size", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf8") as f:
+        strings = [line.rstrip("\n") for line in f if line.strip()]
+
+    stats = BatchStats()
+    translations = await translate_many(
+        translators[args.language],
+        strings,
+        TranslationStore(args.db),
+        language=args.language,
+        max_items=args.batch_size,
+        concurrency=args.concurrency,
+        stats=stats,
+    )
+    for text in strings:
+        print(f"{text}\t{translations.get(text, '')}")
+    print(stats, file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,14 @@
 import asyncio
+import sys
+from pathlib import Path
 
-from agents import Agent, handoff, Runner, SQLiteSession, RunContextWrapper
+from agents import Agent, handoff, SQLiteSession, RunContextWrapper
 from pydantic import BaseModel, Field
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.compaction import CompactingSession
+from agentlib.handoff_router import HandoffRouter, Rule
+
 french_agent = Agent(
     name="French Translator",
     instructions="Translate everything to french"
@@ -23,10 +29,20 @@ triage_agent = Agent(name="Triage agent", handoffs=[
     handoff(agent=spanish_agent, input_type=TranslationInput, on_handoff=on_handoff)
 ])
 
+# "translate to French: 'hello world'" needs no model to pick the translator
+TRANSLATE_TO = r"^\s*translate\s+(?:this\s+)?(?:in)?to\s+{language}\s*:\s*['\"]?(?P<text_to_translate>.+?)['\"]?\s*$"
+
+router = HandoffRouter(triage_agent, [
+    Rule(TRANSLATE_TO.format(language="french"), french_agent),
+    Rule(TRANSLATE_TO.format(language="spanish"), spanish_agent),
+])
+
 async def main():
-    session = SQLiteSession("handoffs", "handoffs.db")
-    result = await Runner.run(triage_agent, "translate to French: 'hello world'", session=session)
-    print(result.final_output)
+    session = CompactingSession(SQLiteSession("handoffs", "handoffs.db"), db_path="handoffs.db", model=triage_agent.model)
+    for message in ["translate to French: 'hello world'", "How do you say good morning in Spanish?"]:
+        result = await router.run(message, session=session)
+        print(result.final_output)
+    print(f"Routing: {router.stats}")
 
 if __name__ == "__main__":
     asyncio.run(main())
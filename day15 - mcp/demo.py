@@ -1,24 +1,35 @@
 import asyncio
+import sys
+from pathlib import Path
 from agents import Agent, Runner, function_tool
-from agents.mcp.server import MCPServerStdio, MCPServerStreamableHttp
+from agents.mcp.server import MCPServerStreamableHttp
 
-fetch_server = MCPServerStreamableHttp(
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.mcp_pool import MCPPool
+
+pool = MCPPool()
+pool.add(MCPServerStreamableHttp(
+    name="fetch",
     params={"url": "https://remote.mcpservers.org/fetch/mcp"}
-)
+))
 
 
 async def main():
-    await fetch_server.connect()
+    async with pool:
+        agent = Agent(
+            name="Assistant",
+            mcp_servers=[await pool.get("fetch")],
+            instructions="You are a helpful assistant",
+        )
 
-    agent = Agent(
-        name="Assistant",
-        mcp_servers=[fetch_server],
-        instructions="You are a helpful assistant",
-    )
+        # Both runs share one connection, and the second reuses the fetched page
+        for question in ["What's new today according to ynet?", "Any sports news on ynet today?"]:
+            result = await Runner.run(agent, question)
+            print(result.to_input_list())
+            print(result.final_output)
 
-    result = await Runner.run(agent, "What's new today according to ynet?")
-    print(result.to_input_list())
-    print(result.final_output)
+        cache = pool.result_cache
+        print(f"fetch cache: {cache.hits} hits, {cache.revalidated} revalidated, {cache.misses} misses")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,8 +1,17 @@
 import asyncio
+import sys
+from pathlib import Path
 from agents import Agent, Runner
 from agents.mcp import MCPServer, MCPServerStreamableHttp
 from agents.model_settings import ModelSettings
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.mcp_pool import MCPPool
+from agentlib.tool_router import ToolRouter
+
+# Only the tools that match the question are sent with the request
+router = ToolRouter(k=3)
+
 
 async def run(mcp_server: MCPServer):
     agent = Agent(
@@ -12,20 +21,26 @@ async def run(mcp_server: MCPServer):
         model_settings=ModelSettings(tool_choice="required"),
     )
 
-    result = await Runner.run(agent, "Summarize the top stories from ynet today. URL is: https://www.ynet.co.il/news/category/184")
+    question = "Summarize the top stories from ynet today. URL is: https://www.ynet.co.il/news/category/184"
+    result = await Runner.run(await router.route(agent, question), question)
     print(result.to_input_list())
     print(result.final_output)
 
 
 async def main():
-    async with MCPServerStreamableHttp(
+    # The pool keeps the connection open between runs and remembers the tools
+    # list on disk, so we don't reconnect or call list_tools for every run
+    pool = MCPPool()
+    pool.add(MCPServerStreamableHttp(
         name="Streamable HTTP Python Server",
-        cache_tools_list=True,
         params={
             "url": "https://remote.mcpservers.org/fetch/mcp",
         },
-    ) as server:
-        await run(server)
+    ))
+    async with pool:
+        for _ in range(2):
+            await run(await pool.get("Streamable HTTP Python Server"))
+    print(f"Tool routing: {router.stats}")
 
 
 if __name__ == "__main__":
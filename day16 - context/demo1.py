@@ -1,11 +1,17 @@
 from typing_extensions import TypedDict
-from agents import Agent, function_tool, Runner, SQLiteSession, RunContextWrapper
+from agents import Agent, function_tool, Runner, SQLiteSession, RunContextWrapper, ModelSettings
 from agents.extensions.models.litellm_model import LitellmModel
 from pydantic import BaseModel
 
-import requests
 import os
+import sys
 import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.compaction import CompactingSession
+from agentlib.tool_cache import cache_stats, memoize
+from agentlib.tool_exec import http_client, pooled
 
 class AssistantContext(BaseModel):
     weather_api_url: str
@@ -16,6 +22,8 @@ class Location(TypedDict):
     long: float
 
 @function_tool
+@memoize(ttl=600)
+@pooled(timeout=10, max_concurrency=8)
 async def fetch_weather(wrapper: RunContextWrapper[AssistantContext], location: Location) -> str:
     base_url = wrapper.context.weather_api_url
     params = {
@@ -25,9 +33,8 @@ async def fetch_weather(wrapper: RunContextWrapper[AssistantContext], location:
         "units": "metric"
     }
 
-    # Run the synchronous requests call in a thread pool
-    loop = asyncio.get_event_loop()
-    response = await loop.run_in_executor(None, requests.get, base_url, params)
+    # Shared keep-alive client, so the four cities are fetched concurrently
+    response = await http_client().get(base_url, params=params)
     response.raise_for_status()
 
     data = response.json()
@@ -44,13 +51,15 @@ agent = Agent(
     name="Assistant",
     model=LitellmModel(model="github/gpt-4.1", api_key=os.environ["GITHUB_TOKEN"]),
     tools=[fetch_weather],
+    model_settings=ModelSettings(parallel_tool_calls=True),
 )
 
 async def main():
-    session = SQLiteSession("weather", "weather.db")
+    session = CompactingSession(SQLiteSession("weather", "weather.db"), db_path="weather.db", model=agent.model)
     ctx = AssistantContext(weather_api_key=os.getenv("OPENWEATHER_API_KEY"), weather_api_url="https://api.openweathermap.org/data/2.5/weather")
     result = await Runner.run(agent, "I'm planning a trip to Israel, what is the weather in Tel Aviv, Jerusalem, Haifa and Eilat today?", session=session, context=ctx)
     print(result.final_output)
+    print(cache_stats())
 
 if __name__ == "__main__":
     asyncio.run(main())
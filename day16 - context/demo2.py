@@ -2,7 +2,7 @@ from optparse import Option
 
 import agents.run
 from typing_extensions import TypedDict
-from agents import Agent, function_tool, Runner, SQLiteSession, RunContextWrapper, run_demo_loop, trace, set_trace_processors
+from agents import Agent, function_tool, SQLiteSession, RunContextWrapper, run_demo_loop, trace, set_trace_processors
 from agents.extensions.models.litellm_model import LitellmModel
 from pydantic import BaseModel
 from typing import Optional
@@ -10,7 +10,14 @@ from langsmith.wrappers import OpenAIAgentsTracingProcessor
 
 import requests
 import os
+import sys
 import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.compaction import CompactingSession
+from agentlib.context_store import ContextStore
+from agentlib.tracing import ProcessorExporter, SamplingProcessor
 
 
 class UserContext(BaseModel):
@@ -37,15 +44,17 @@ agent = Agent(
 )
 
 async def main():
-    session = SQLiteSession("info")
-    ctx = UserContext(name=None, favorite_programming_language=None)
+    # The context is stored next to the session, a returning student isn't asked again
+    session = CompactingSession(SQLiteSession("info", "info.db"), db_path="info.db", model=agent.model)
+    contexts = ContextStore(UserContext, "info.db")
+    ctx = await contexts.get(session.session_id)
 
     with trace(workflow_name="GetUserDetails"):
         next_message = "Start the conversation with the student."
-        while True:
-            result = await Runner.run(agent, next_message, session=session, context=ctx)
+        while not contexts.is_complete(ctx):
+            result = await contexts.run(agent, next_message, session=session)
             print(result.final_output)
-            if ctx.name is not None and ctx.favorite_programming_language is not None:
+            if contexts.is_complete(ctx):
                 break
 
             next_message = input()
@@ -53,5 +62,10 @@ async def main():
     print(ctx)
 
 if __name__ == "__main__":
-    set_trace_processors([OpenAIAgentsTracingProcessor()])
+    # LangSmith gets traces in batches from a background thread, AGENT_TRACE_SAMPLE of them
+    # plus every failed or slow one
+    set_trace_processors([SamplingProcessor(
+        ProcessorExporter(OpenAIAgentsTracingProcessor()),
+        head_rate=float(os.environ.get("AGENT_TRACE_SAMPLE", 1)),
+    )])
     asyncio.run(main())
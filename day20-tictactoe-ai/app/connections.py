@@ -0,0 +1,255 @@
+"""Which worker holds which client's WebSocket.
+
+The assistant's `play` tool sends a message to the browser over the client's
+WebSocket, but with several uvicorn workers the chat request and the socket
+can land on different processes. Routes talk to a connection registry
+instead of a dict of sockets:
+
+- `LocalRegistry` keeps the sockets in this process (one worker).
+- `BrokerRegistry` also connects to a small broker over a Unix socket. Every
+  worker tells the broker which clients it holds, and a message for a client
+  on another worker is relayed to that worker, which acks the delivery.
+
+Run the broker next to the workers and point them at it:
+
+    python -m app.connections --socket /tmp/tictactoe.sock
+    TICTACTOE_BROKER=/tmp/tictactoe.sock uvicorn app.main:app --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+
+class LocalRegistry:
+    """Connections of this process only"""
+
+    def __init__(self):
+        self.active_connections: Dict[str, WebSocket] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def add_client(self, client_id: str, websocket: WebSocket):
+        self.active_connections[client_id] = websocket
+
+    async def remove_client(self, client_id: str, websocket: Optional[WebSocket] = None):
+        # A reconnect may already have replaced the socket, keep the new one
+        if websocket is None or self.active_connections.get(client_id) is websocket:
+            self.active_connections.pop(client_id, None)
+
+    async def is_connected(self, client_id: str) -> bool:
+        return client_id in self.active_connections
+
+    async def send(self, client_id: str, message: dict) -> bool:
+        """Send a message to a client, returns False if it isn't connected"""
+        websocket = self.active_connections.get(client_id)
+        if websocket is None:
+            return False
+        try:
+            await websocket.send_json(message)
+        except Exception as e:
+            logger.info("Sending to %s failed: %s", client_id, e)
+            return False
+        return True
+
+
+async def _write(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+class BrokerRegistry(LocalRegistry):
+    """Local connections plus routing through the broker for everything else"""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        super().__init__()
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._listener: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._deliveries: set = set()
+
+    async def start(self):
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            # After a broker restart, tell it again which clients live here
+            for client_id in self.active_connections:
+                await _write(self._writer, {"op": "register", "client": client_id})
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message["op"] == "deliver":
+                    task = asyncio.create_task(self._deliver(message))
+                    self._deliveries.add(task)
+                    task.add_done_callback(self._deliveries.discard)
+                elif message["op"] in ("ack", "found"):
+                    future = self._replies.pop(message["id"], None)
+                    if future is not None and not future.done():
+                        future.set_result(message["ok"])
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.warning("Lost the connection to the broker: %s", e)
+        finally:
+            for future in self._replies.values():
+                if not future.done():
+                    future.set_result(False)
+            self._replies.clear()
+            if self._writer is not None:
+                self._writer.close()
+
+    async def _deliver(self, message: dict):
+        ok = await LocalRegistry.send(self, message["client"], message["message"])
+        try:
+            await _write(self._writer, {"op": "ack", "id": message["id"], "ok": ok})
+        except OSError:
+            pass
+
+    async def _request(self, message: dict) -> bool:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = future
+        try:
+            # OSError covers a broker that isn't running (FileNotFoundError) as
+            # well as a dropped connection
+            await self.start()
+            await _write(self._writer, {**message, "id": request_id})
+            return await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            logger.info("Broker request %s failed: %r", message["op"], e)
+            return False
+        finally:
+            self._replies.pop(request_id, None)
+
+    async def add_client(self, client_id: str, websocket: WebSocket):
+        await super().add_client(client_id, websocket)
+        await self.start()
+        await _write(self._writer, {"op": "register", "client": client_id})
+
+    async def remove_client(self, client_id: str, websocket: Optional[WebSocket] = None):
+        if websocket is not None and self.active_connections.get(client_id) is not websocket:
+            return
+        await super().remove_client(client_id)
+        try:
+            await _write(self._writer, {"op": "unregister", "client": client_id})
+        except (AttributeError, OSError):
+            pass
+
+    async def is_connected(self, client_id: str) -> bool:
+        if client_id in self.active_connections:
+            return True
+        return await self._request({"op": "lookup", "client": client_id})
+
+    async def send(self, client_id: str, message: dict) -> bool:
+        if client_id in self.active_connections:
+            return await super().send(client_id, message)
+        return await self._request({"op": "send", "client": client_id, "message": message})
+
+
+class Broker:
+    """Relays messages between workers, knows which worker owns which client"""
+
+    def __init__(self):
+        self.owners: Dict[str, asyncio.StreamWriter] = {}
+        # Relayed message id -> (requesting worker, its request id)
+        self._pending: Dict[int, tuple] = {}
+        self._ids = itertools.count(1)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await self._dispatch(json.loads(line), writer)
+        except ConnectionError:
+            pass
+        finally:
+            for client_id in [client_id for client_id, owner in self.owners.items() if owner is writer]:
+                del self.owners[client_id]
+            for relay_id, (requester, request_id) in list(self._pending.items()):
+                if requester is writer:
+                    del self._pending[relay_id]
+            writer.close()
+
+    async def _dispatch(self, message: dict, writer: asyncio.StreamWriter):
+        op = message["op"]
+        if op == "register":
+            self.owners[message["client"]] = writer
+        elif op == "unregister":
+            if self.owners.get(message["client"]) is writer:
+                del self.owners[message["client"]]
+        elif op == "lookup":
+            await _write(writer, {"op": "found", "id": message["id"], "ok": message["client"] in self.owners})
+        elif op == "send":
+            owner = self.owners.get(message["client"])
+            if owner is None:
+                await _write(writer, {"op": "ack", "id": message["id"], "ok": False})
+                return
+            relay_id = next(self._ids)
+            self._pending[relay_id] = (writer, message["id"])
+            try:
+                await _write(owner, {"op": "deliver", "id": relay_id, "client": message["client"], "message": message["message"]})
+            except ConnectionError:
+                del self._pending[relay_id]
+                await _write(writer, {"op": "ack", "id": message["id"], "ok": False})
+        elif op == "ack":
+            requester, request_id = self._pending.pop(message["id"], (None, None))
+            if requester is not None and not requester.is_closing():
+                await _write(requester, {"op": "ack", "id": request_id, "ok": message["ok"]})
+
+
+def registry_from_env() -> LocalRegistry:
+    socket_path = os.environ.get("TICTACTOE_BROKER")
+    if socket_path:
+        return BrokerRegistry(socket_path)
+    return LocalRegistry()
+
+
+async def serve_broker(socket_path: str):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(Broker().handle, path=socket_path)
+    print(f"Connection broker listening on {socket_path}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connection broker for running several workers")
+    parser.add_argument("--socket", default=os.environ.get("TICTACTOE_BROKER", "/tmp/tictactoe.sock"))
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_broker(args.socket))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,151 @@
+"""Perfect tic-tac-toe play from a precomputed table.
+
+A position is two 9-bit bitboards, one per mark (bit `row * 3 + column`).
+On import every position reachable from the empty board (5478 of them) is
+solved once with negamax, and the best move and score for the side to move
+are stored in flat arrays indexed by `x | o << 9`. After that a move is a
+single array lookup.
+
+`difficulty` goes from 0 (random legal moves) to 1 (perfect play): it is the
+chance that a move is taken from the table instead of picked at random.
+
+    python -m app.engine    # moves per second
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+FULL = 0b111111111
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,  # diagonals
+)
+# Center, corners, then edges: among equally good moves the table keeps the first
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+_SIZE = 1 << 18
+_best_move = array("b", [-1]) * _SIZE
+_score = array("b", [0]) * _SIZE
+_solved = bytearray(_SIZE)
+
+
+def _key(x: int, o: int) -> int:
+    return x | o << 9
+
+
+def has_line(bits: int) -> bool:
+    return any(bits & mask == mask for mask in WIN_MASKS)
+
+
+def x_to_move(x: int, o: int) -> bool:
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def _solve(x: int, o: int) -> int:
+    """Score for the side to move: positive wins, negative loses, faster is bigger"""
+    key = _key(x, o)
+    if _solved[key]:
+        return _score[key]
+    x_moves = x_to_move(x, o)
+    empty = FULL & ~(x | o)
+    # The player who just moved may have won
+    if has_line(o if x_moves else x):
+        score = -(bin(empty).count("1") + 1)
+    elif not empty:
+        score = 0
+    else:
+        score, best = -100, -1
+        for move in MOVE_ORDER:
+            bit = 1 << move
+            if not empty & bit:
+                continue
+            value = -(_solve(x | bit, o) if x_moves else _solve(x, o | bit))
+            if value > score:
+                score, best = value, move
+        _best_move[key] = best
+    _score[key] = score
+    _solved[key] = 1
+    return score
+
+
+_solve(0, 0)
+POSITIONS = sum(_solved)
+
+
+def from_cells(cells: Sequence[Optional[str]]) -> Tuple[int, int]:
+    """Bitboards for a list of 9 cells holding "X", "O" or None"""
+    x = o = 0
+    for index, cell in enumerate(cells):
+        if cell == "X":
+            x |= 1 << index
+        elif cell == "O":
+            o |= 1 << index
+    return x, o
+
+
+def from_string(board: str) -> Tuple[int, int]:
+    """Bitboards for a 9 character string like "X.O......" (anything but X/O is empty)"""
+    return from_cells([cell.upper() if cell.upper() in "XO" else None for cell in board])
+
+
+def empty_cells(x: int, o: int) -> List[int]:
+    return [index for index in range(9) if not (x | o) >> index & 1]
+
+
+def winner(x: int, o: int) -> Optional[str]:
+    if has_line(x):
+        return "X"
+    if has_line(o):
+        return "O"
+    if x | o == FULL:
+        return "Draw"
+    return None
+
+
+def best_move(x: int, o: int) -> int:
+    """Optimal move for the side to move, -1 for finished or unreachable positions"""
+    return _best_move[_key(x, o)]
+
+
+def outcome(x: int, o: int) -> str:
+    """Result with best play from both sides, from the point of view of the side to move"""
+    score = _score[_key(x, o)]
+    return "win" if score > 0 else "loss" if score < 0 else "draw"
+
+
+def choose_move(x: int, o: int, difficulty: float = 1.0, rng: random.Random = random) -> int:
+    """Table move with probability `difficulty`, otherwise a random empty cell"""
+    empties = empty_cells(x, o)
+    if not empties:
+        return -1
+    move = best_move(x, o)
+    if move < 0 or rng.random() >= difficulty:
+        return rng.choice(empties)
+    return move
+
+
+def benchmark(seconds: float = 1.0) -> float:
+    """Table lookups per second, cycling through every unfinished reachable position"""
+    positions = [key for key in range(_SIZE) if _solved[key] and _best_move[key] >= 0]
+    positions = [(key & FULL, key >> 9) for key in positions]
+    moves = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for x, o in positions:
+            best_move(x, o)
+        moves += len(positions)
+    return moves / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    _solved[:] = bytes(_SIZE)
+    _solve(0, 0)
+    print(f"Solved {POSITIONS} positions in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"{benchmark():,.0f} moves per second")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import random
-from typing import List, Literal, Optional, Dict
+import os
+from typing import List, Literal, Optional
 from fastapi import APIRouter, HTTPException, WebSocket, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
@@ -9,61 +9,71 @@ from openai.types.responses import ResponseTextDeltaEvent
 from openai.types.responses.response_input_item_param import Message, ResponseInputItemParam
 from agents import Agent, Runner, trace, function_tool, RunContextWrapper
 
+from . import engine
+from .connections import registry_from_env
+
 router = APIRouter()
 
 Mark = Literal["X", "O"]
 
 class WebsocketContext:
-    def __init__(self, websocket: WebSocket):
-        self.websocket = websocket
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+
+    async def send_json(self, message: dict) -> bool:
+        # The socket may be held by another worker, the registry finds it
+        return await connection_manager.send(self.client_id, message)
 
 @function_tool
 async def play(ctx: RunContextWrapper[WebsocketContext], row: int, column: int):
     """Make a move in the tic tac toe game at the specified row and column (0-2)"""
-    websocket = ctx.context.websocket
-    await websocket.send_json({
+    delivered = await ctx.context.send_json({
         "action": "play", 
         "payload": {"row": row, "column": column}
     })
+    if not delivered:
+        return "Could not reach the game board, the player is disconnected"
     return f"Played at row {row}, column {column}"
 
 
+@function_tool
+def best_move(board: str) -> str:
+    """Find the best move for whoever's turn it is.
+
+    Args:
+        board: the 9 cells row by row, X, O or . for empty, e.g. "X...O...."
+    """
+    x, o = engine.from_string(board)
+    move = engine.best_move(x, o)
+    if move < 0:
+        return "There is no move to make, the game is over or the board is invalid"
+    player = "X" if engine.x_to_move(x, o) else "O"
+    return (
+        f"{player} should play row {move // 3}, column {move % 3}. "
+        f"With best play from here {player} will {engine.outcome(x, o).replace('loss', 'lose')}."
+    )
+
+
 assistant = Agent(
     name="game_assistant",
-    tools=[play],
+    tools=[best_move, play],
     instructions=(
         "You are a friendly assistant helping the user play tic tac toe. You can make moves in the game by calling the play function."        
+        " Don't work out moves yourself: call best_move with the current board to get the best move, then explain it to the user."
     ),
 )
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def add_client(self, client_id: str, websocket: WebSocket):
-        """Add a new client connection"""
-        self.active_connections[client_id] = websocket
-    
-    def remove_client(self, client_id: str):
-        """Remove a client connection"""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-    
-    def get_websocket(self, client_id: str) -> Optional[WebSocket]:
-        """Get websocket connection for a client"""
-        return self.active_connections.get(client_id)
-    
-    async def send_personal_message(self, message: dict, client_id: str):
-        """Send a message to a specific client"""
-        websocket = self.get_websocket(client_id)
-        if websocket:
-            await websocket.send_json(message)
+# In-process, or shared between workers through a broker when TICTACTOE_BROKER is set
+connection_manager = registry_from_env()
+
 
-connection_manager = ConnectionManager()
+# 1 plays perfectly, 0 plays random moves
+DEFAULT_DIFFICULTY = float(os.environ.get("TICTACTOE_DIFFICULTY", 1.0))
 
 
 class NextMoveRequest(BaseModel):
     board: List[Optional[Mark]] = Field(..., min_length=9, max_length=9)
+    difficulty: Optional[float] = Field(None, ge=0, le=1)
 
     @validator("board")
     def validate_board(cls, v: List[Optional[Mark]]) -> List[Optional[Mark]]:
@@ -87,15 +97,18 @@ class ChatCompletionRequest(BaseModel):
 
 @router.post("/api/next_move", response_model=NextMoveResponse)
 def next_move(payload: NextMoveRequest) -> NextMoveResponse:
-    """Return a random empty cell index for the computer move.
+    """Return the computer's move from the engine's precomputed table.
 
     - Expects `board` as a list of 9 items with values 'X', 'O', or null.
+    - `difficulty` (0-1, default TICTACTOE_DIFFICULTY) is the chance of the best move,
+      otherwise a random empty cell is picked.
     - Responds with `index` in [0, 8] where the computer should play.
     """
-    empties = [i for i, cell in enumerate(payload.board) if cell is None]
-    if not empties:
+    x, o = engine.from_cells(payload.board)
+    difficulty = DEFAULT_DIFFICULTY if payload.difficulty is None else payload.difficulty
+    idx = engine.choose_move(x, o, difficulty)
+    if idx < 0:
         raise HTTPException(status_code=400, detail="No empty squares available")
-    idx = random.choice(empties)
     return NextMoveResponse(index=idx)
 
 @router.post('/api/complete')
@@ -103,13 +116,11 @@ async def complete(request: ChatCompletionRequest, client_id: str = Query(...)):
     """Stream the assistant's response using Server-Sent Events."""
     # Convert Pydantic models to dictionaries for JSON serialization
     messages = [message.model_dump() for message in request.payload]
-    websocket = connection_manager.get_websocket(client_id)
-    
-    if not websocket:
+    if not await connection_manager.is_connected(client_id):
         raise HTTPException(status_code=400, detail="WebSocket connection not found for client_id")
 
     async def generate_stream():
-        result = Runner.run_streamed(assistant, messages, WebsocketContext(websocket))
+        result = Runner.run_streamed(assistant, messages, WebsocketContext(client_id))
         async for event in result.stream_events():
             if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
                 # Send the delta as Server-Sent Events format
@@ -128,8 +139,8 @@ async def complete(request: ChatCompletionRequest, client_id: str = Query(...)):
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
-    await connection_manager.add_client(client_id, websocket)
     try:
+        await connection_manager.add_client(client_id, websocket)
         while True:
             # Keep the connection alive and listen for any messages
             data = await websocket.receive_text()
@@ -138,4 +149,4 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        connection_manager.remove_client(client_id)
+        await connection_manager.remove_client(client_id, websocket)
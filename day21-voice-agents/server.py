@@ -3,6 +3,9 @@ import base64
 import json
 import logging
 import struct
+import sys
+import time
+from array import array
 from typing import Any
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -17,6 +20,31 @@ from agents.realtime import RealtimeAgent
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Audio travels as binary WebSocket frames of raw 24kHz mono int16 little-endian PCM,
+# everything else as JSON text frames.
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def pcm_from_frame(data: bytes) -> bytes:
+    """PCM for send_audio from a binary frame, without copying in the common case.
+
+    The browser already sends little-endian int16, which is what send_audio
+    wants, so the bytes pass through unchanged on any host.
+    """
+    if len(data) % SAMPLE_WIDTH:
+        data = memoryview(data)[: len(data) - len(data) % SAMPLE_WIDTH].tobytes()
+    return data
+
+
+def pcm_from_json(int16_data: list[int]) -> bytes:
+    """PCM from the old JSON format, {"type": "audio", "data": [int16, ...]}"""
+    # array("h") packs in host order, the wire format is little-endian
+    samples = array("h", int16_data)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
 
 class RealtimeWebSocketManager:
     def __init__(self):
@@ -63,9 +91,12 @@ class RealtimeWebSocketManager:
             websocket = self.websockets[session_id]
 
             async for event in session:
+                if event.type == "audio":
+                    # Raw PCM, no base64 and no JSON
+                    await websocket.send_bytes(event.audio.data)
+                    continue
                 event_data = await self._serialize_event(event)
-                print("Message received from agent - sending back to user")
-                print(event_data)
+                logger.debug("Event from agent: %s", event_data["type"])
                 await websocket.send_text(json.dumps(event_data))
         except Exception as e:
             logger.error(f"Error processing events for session {session_id}: {e}")
@@ -88,7 +119,8 @@ class RealtimeWebSocketManager:
             base_event["tool"] = event.tool.name
             base_event["output"] = str(event.output)
         elif event.type == "audio":
-            base_event["audio"] = base64.b64encode(event.audio.data).decode("utf-8")
+            # Sent as a binary frame by _process_events
+            pass
         elif event.type == "audio_interrupted":
             pass
         elif event.type == "audio_end":
@@ -125,16 +157,20 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await manager.connect(websocket, session_id)
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            print("Message received from user:")
-            print(message)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
 
+            if message.get("bytes") is not None:
+                await manager.send_audio(session_id, pcm_from_frame(message["bytes"]))
+                continue
+
+            message = json.loads(message["text"])
             if message["type"] == "audio":
-                # Convert int16 array to bytes
-                int16_data = message["data"]
-                audio_bytes = struct.pack(f"{len(int16_data)}h", *int16_data)
-                await manager.send_audio(session_id, audio_bytes)
+                # Older clients send int16 arrays as JSON
+                await manager.send_audio(session_id, pcm_from_json(message["data"]))
+            else:
+                logger.info("Message received from user: %s", message)
 
     except WebSocketDisconnect:
         await manager.disconnect(session_id)
@@ -148,7 +184,34 @@ async def read_index():
     return FileResponse("static/index.html")
 
 
+def benchmark(audio_seconds: int = 60, chunk_samples: int = 4096) -> None:
+    """CPU seconds spent per second of audio, JSON+base64 framing against binary frames"""
+    chunk = array("h", (((i * 37) % 65536) - 32768 for i in range(chunk_samples)))
+    chunks = audio_seconds * SAMPLE_RATE // chunk_samples
+    json_in = json.dumps({"type": "audio", "data": chunk.tolist()})
+    pcm = chunk.tobytes()
+
+    def measure(name: str, fn) -> None:
+        started = time.process_time()
+        for _ in range(chunks):
+            fn()
+        spent = time.process_time() - started
+        print(f"{name:<34} {spent / audio_seconds * 1000:8.3f} ms CPU per audio second")
+
+    print(f"{audio_seconds}s of {SAMPLE_RATE}Hz audio in chunks of {chunk_samples} samples")
+    print(f"inbound frame:  JSON {len(json_in)} bytes, binary {len(pcm)} bytes")
+    print(f"outbound frame: JSON+base64 {len(json.dumps({'type': 'audio', 'audio': base64.b64encode(pcm).decode()}))} bytes, binary {len(pcm)} bytes")
+    measure("inbound JSON list + struct.pack", lambda: struct.pack(f"{chunk_samples}h", *json.loads(json_in)["data"]))
+    measure("inbound binary frame", lambda: pcm_from_frame(pcm))
+    measure("outbound base64 + JSON", lambda: json.dumps({"type": "audio", "audio": base64.b64encode(pcm).decode("utf-8")}))
+    measure("outbound binary frame", lambda: pcm)
+
+
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+        sys.exit()
+
     import uvicorn
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -49,6 +49,8 @@ class RealtimeDemo {
     async connect() {
         try {
             this.ws = new WebSocket(`ws://localhost:8000/ws/${this.sessionId}`);
+            // Audio comes as binary frames of raw int16 PCM, everything else as JSON
+            this.ws.binaryType = 'arraybuffer';
             
             this.ws.onopen = () => {
                 this.isConnected = true;
@@ -57,6 +59,10 @@ class RealtimeDemo {
             };
             
             this.ws.onmessage = (event) => {
+                if (event.data instanceof ArrayBuffer) {
+                    this.playAudio(event.data);
+                    return;
+                }
                 const data = JSON.parse(event.data);
                 this.handleRealtimeEvent(data);
             };
@@ -152,10 +158,7 @@ class RealtimeDemo {
                         int16Buffer[i] = Math.max(-32768, Math.min(32767, inputBuffer[i] * 32768));
                     }
                     
-                    this.ws.send(JSON.stringify({
-                        type: 'audio',
-                        data: Array.from(int16Buffer)
-                    }));
+                    this.ws.send(int16Buffer.buffer);
                 }
             };
             
@@ -201,9 +204,6 @@ class RealtimeDemo {
         
         // Handle specific event types
         switch (event.type) {
-            case 'audio':
-                this.playAudio(event.audio);
-                break;
             case 'audio_interrupted':
                 this.stopAudioPlayback();
                 break;
@@ -346,15 +346,15 @@ class RealtimeDemo {
         this.toolsContent.scrollTop = this.toolsContent.scrollHeight;
     }
     
-    async playAudio(audioBase64) {
+    async playAudio(audioData) {
         try {
-            if (!audioBase64 || audioBase64.length === 0) {
+            if (!audioData || audioData.byteLength === 0) {
                 console.warn('Received empty audio data, skipping playback');
                 return;
             }
             
             // Add to queue
-            this.audioQueue.push(audioBase64);
+            this.audioQueue.push(audioData);
             
             // Start processing queue if not already playing
             if (!this.isPlayingAudio) {
@@ -379,24 +379,18 @@ class RealtimeDemo {
         }
         
         while (this.audioQueue.length > 0) {
-            const audioBase64 = this.audioQueue.shift();
-            await this.playAudioChunk(audioBase64);
+            const audioData = this.audioQueue.shift();
+            await this.playAudioChunk(audioData);
         }
         
         this.isPlayingAudio = false;
     }
     
-    async playAudioChunk(audioBase64) {
+    async playAudioChunk(audioData) {
         return new Promise((resolve, reject) => {
             try {
-                // Decode base64 to ArrayBuffer
-                const binaryString = atob(audioBase64);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {
-                    bytes[i] = binaryString.charCodeAt(i);
-                }
-                
-                const int16Array = new Int16Array(bytes.buffer);
+                // Raw int16 PCM, an odd trailing byte is dropped
+                const int16Array = new Int16Array(audioData, 0, Math.floor(audioData.byteLength / 2));
                 
                 if (int16Array.length === 0) {
                     console.warn('Audio chunk has no samples, skipping');
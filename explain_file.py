@@ -1,25 +1,26 @@
 import asyncio
-from agents import Agent, Runner, function_tool
+import sys
+from agents import Agent, ModelSettings, Runner
 
-@function_tool()
-def read_shells_file():
-    """
-    Reads the file /etc/shells and returns the full content
-    """
-    print("Tool Call: read_shells_file")
-    with open('/etc/shells', 'r', encoding='utf8') as f:
-        return f.read()
+from agentlib.file_tools import file_tools
+from agentlib.response_cache import DiskCache, cached
 
-async def main():
-    agent = Agent(
+async def main(path: str, question: str):
+    agent = cached(Agent(
         name="Assistant",
-        tools=[read_shells_file],
-        instructions="Answer questions about the file /etc/shells",
-    )
+        model_settings=ModelSettings(temperature=0),
+        tools=file_tools(allowed=[path]),
+        instructions=(
+            f"Answer questions about the file {path}. "
+            "Start with file_info, then read only the chunks, line ranges or grep matches you need."
+        ),
+    ), DiskCache())
 
-    result = await Runner.run(agent, "What shells are installed?")
+    result = await Runner.run(agent, question)
     print(result.to_input_list())
     print(result.final_output)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    path = sys.argv[1] if len(sys.argv) > 1 else "/etc/shells"
+    question = sys.argv[2] if len(sys.argv) > 2 else "What shells are installed?"
+    asyncio.run(main(path, question))
@@ -113,6 +113,9 @@ class ChatAgent {
         // Initialize streaming message container
         this.currentStreamingMessage = this.createStreamingMessage();
         
+        // A frame can be split across chunks, keep the incomplete last line for the next one
+        let buffered = '';
+        
         try {
             while (true) {
                 const { done, value } = await reader.read();
@@ -120,8 +123,9 @@ class ChatAgent {
                 if (done) break;
                 
                 // Decode the chunk
-                const chunk = decoder.decode(value, { stream: true });
-                const lines = chunk.split('\n');
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
                 
                 for (const line of lines) {
                     if (line.startsWith('data: ')) {
@@ -1,11 +1,16 @@
-import json
-from fastapi import FastAPI
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from agents import Agent, ItemHelpers, Runner
-from openai.types.responses import ResponseTextDeltaEvent
+from agents import Runner
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.agent_registry import get_agent, registry
+from agentlib.sse import stream_events_sse
 
 app = FastAPI()
 
@@ -32,54 +37,33 @@ async def index():
         return HTMLResponse(content=f.read())
 
 @app.post("/chat")
-async def chat(request: ChatRequest):
-    async def generate():
-        agent = Agent(
-            name=request.agent_name,
-            instructions=request.agent_instructions,
-        )
-
-        result = Runner.run_streamed(
-            agent,
-            input=request.message,
-        )
-
-        # Send initial message to indicate start
-        yield f"data: {json.dumps({'type': 'start', 'message': 'Starting chat...'})}\n\n"
-
-        async for event in result.stream_events():
-            # Handle different event types
-            if event.type == "raw_response_event":
-                if isinstance(event.data, ResponseTextDeltaEvent):
-                    # Stream individual tokens
-                    token = event.data.delta
-                    if token:
-                        yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
-
-            elif event.type == "agent_updated_stream_event":
-                yield f"data: {json.dumps({'type': 'agent_update', 'agent_name': event.new_agent.name})}\n\n"
-
-            elif event.type == "run_item_stream_event":
-                if event.item.type == "tool_call_item":
-                    yield f"data: {json.dumps({'type': 'tool_call', 'message': 'Tool was called'})}\n\n"
-                elif event.item.type == "tool_call_output_item":
-                    yield f"data: {json.dumps({'type': 'tool_output', 'content': str(event.item.output)})}\n\n"
-                elif event.item.type == "message_output_item":
-                    message_text = ItemHelpers.text_message_output(event.item)
-                    yield f"data: {json.dumps({'type': 'message', 'content': message_text})}\n\n"
+async def chat(request: ChatRequest, http_request: Request):
+    # Requests with the same name and instructions share one agent
+    agent = get_agent(
+        request.agent_name,
+        instructions=request.agent_instructions,
+    )
 
-        # Send completion signal
-        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+    result = Runner.run_streamed(
+        agent,
+        input=request.message,
+    )
 
+    # Tokens are sent in small batches, and the run stops if the browser goes away
     return StreamingResponse(
-        generate(),
-        media_type="text/plain",
+        stream_events_sse(result, http_request),
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
         }
     )
 
+@app.get("/agents/stats")
+async def agent_stats():
+    return registry.stats()
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -1,28 +1,76 @@
+import argparse
 import asyncio
 from agents import Agent, Runner
-from agents.extensions.models.litellm_model import LitellmModel
 import os
 
-async def main():
-    models = [
-        # "openrouter/moonshotai/kimi-k2",
-        # "openrouter/z-ai/glm-4.5",
-        # "openrouter/cognitivecomputations/dolphin-mistral-24b-venice-edition:free",
-        # "openrouter/inception/mercury",
-        "openrouter/google/gemini-2.5-pro"
-    ]
+from agentlib.benchmark import AgentBackend, MockBackend, print_table, run_benchmark, summarize, write_report
+from agentlib.models import get_model
 
+MODELS = [
+    # "openrouter/moonshotai/kimi-k2",
+    # "openrouter/z-ai/glm-4.5",
+    # "openrouter/cognitivecomputations/dolphin-mistral-24b-venice-edition:free",
+    # "openrouter/inception/mercury",
+    "openrouter/google/gemini-2.5-pro"
+]
+
+PROMPTS = ["Tell me about recursion in programming."]
+
+INSTRUCTIONS = "You only respond in haikus."
+
+
+async def hello(models: list[str]):
     for model in models:
         agent = Agent(
             name="Assistant",
-            model=LitellmModel(model=model),
-            instructions="You only respond in haikus.",
+            model=get_model(model),
+            instructions=INSTRUCTIONS,
         )
 
         print(f"Model: {model}")
-        result = await Runner.run(agent, "Tell me about recursion in programming.")
+        result = await Runner.run(agent, PROMPTS[0])
         print(result.final_output)
         print("---")
 
+
+async def benchmark(args):
+    prompts = PROMPTS
+    if args.prompts:
+        with open(args.prompts, encoding="utf8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    backend = MockBackend() if args.mock else AgentBackend(INSTRUCTIONS)
+    samples = await run_benchmark(
+        backend,
+        args.models or MODELS,
+        prompts,
+        repeats=args.repeats,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+    )
+    stats = summarize(samples)
+    print_table(stats)
+    if args.report:
+        write_report(stats, samples, args.report)
+        print(f"Report written to {args.report}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask a few models the same question, or benchmark them")
+    parser.add_argument("models", nargs="*", help="LiteLLM model ids (default: the MODELS list)")
+    parser.add_argument("--bench", action="store_true", help="measure latency instead of printing answers")
+    parser.add_argument("--prompts", help="file with one prompt per line")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--report", help="write a .json or .csv report")
+    parser.add_argument("--mock", action="store_true", help="use a fake model backend, no network needed")
+    args = parser.parse_args()
+
+    if args.bench or args.mock:
+        asyncio.run(benchmark(args))
+    else:
+        asyncio.run(hello(args.models or MODELS))
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
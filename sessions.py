@@ -1,20 +1,18 @@
 import asyncio
 
-from agents import Agent, Runner, SQLiteSession
+from agents import Agent
+
+from agentlib.conversation import Conversation
 
 async def main():
     agent = Agent(name="Assistant", instructions="Reply very concisely.")
-    user_message = input("> ")
-    result = await Runner.run(agent, user_message)
-    print(result.final_output)
+    conversation = Conversation(agent, debug=True)
 
     while True:
-        print(f"Debug: messages = {result.to_input_list()}")
         user_message = input("> ")
-        result = await Runner.run(agent, result.to_input_list() + [{"role": "user", "content": user_message}])
+        result = await conversation.send(user_message)
         print(result.final_output)
 
 
 if __name__ == '__main__':
     asyncio.run(main())
-
@@ -1,19 +1,23 @@
 import asyncio
-from agents import Agent, Runner
+from agents import Agent, ModelSettings, Runner
 from pydantic import BaseModel
 
+from agentlib.file_tools import file_tools
+from agentlib.response_cache import DiskCache, cached
+
 class ShellInfo(BaseModel):
-    name
+    name: str
 
 async def main():
-    agent = Agent(
+    agent = cached(Agent(
         name="Assistant",
-        instructions="Answer questions about /ets/shells",
-    )
+        instructions="Answer questions about /etc/shells. Page through it with the file tools instead of guessing.",
+        model_settings=ModelSettings(temperature=0),
+        tools=file_tools(allowed=["/etc/shells"]),
+    ), DiskCache())
 
-    shells = open('/etc/shells').read()
     result = await Runner.run(agent, [
-        {"role": "user", "content": f"File: /etc/shells\n\n{shells}"},
+        {"role": "user", "content": "File: /etc/shells"},
         {"role": "user", "content": "what shells are installed?"}
     ])
     print(result.final_output)
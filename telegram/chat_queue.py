@@ -0,0 +1,57 @@
+"""
+Per-chat work queue for the Telegram bot.
+
+Every chat gets at most one agent run at a time, so runs never race on the
+chat's session history. Messages that arrive while a run is in flight are
+kept and sent together as the next turn, which means a burst of messages
+costs one model call instead of one per message. A global semaphore caps
+the number of runs in flight across all chats.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ChatQueue(Generic[T]):
+    def __init__(self, handler: Callable[[Hashable, list[T]], Awaitable[None]], max_in_flight: int = 16):
+        self.handler = handler
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._pending: dict[Hashable, list[T]] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+        self.submitted = 0
+        self.runs = 0
+
+    def submit(self, chat_id: Hashable, item: T) -> None:
+        """Queue an item for the chat and start its worker if needed"""
+        self.submitted += 1
+        self._pending.setdefault(chat_id, []).append(item)
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._work(chat_id))
+
+    async def _work(self, chat_id: Hashable):
+        try:
+            while self._pending.get(chat_id):
+                async with self._semaphore:
+                    # Take everything that arrived so far, including messages
+                    # that came in while we were waiting for the semaphore
+                    batch = self._pending.pop(chat_id)
+                    self.runs += 1
+                    try:
+                        await self.handler(chat_id, batch)
+                    except Exception:
+                        logger.exception("Run for chat %s failed", chat_id)
+        finally:
+            del self._workers[chat_id]
+
+    def in_flight(self) -> int:
+        return len(self._workers)
+
+    async def drain(self):
+        """Wait until every queued item was handled"""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
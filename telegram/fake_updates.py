@@ -0,0 +1,99 @@
+"""
+Fake Telegram updates for benchmarking the webhook offline.
+
+Generates message updates shaped like the ones Telegram sends, spread over a
+number of chats, and POSTs them to the webhook app in-process (through
+httpx's ASGI transport), so no bot token or network is needed.
+
+Usage:
+    python fake_updates.py --updates 20000 --chats 500 --in-flight 16 --delay 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Iterator
+
+import httpx
+
+from chat_queue import ChatQueue
+from webhook import Dispatcher, create_app
+
+
+def fake_update(update_id: int, chat_id: int, text: str) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+def generate(updates: int, chats: int, seed: int = 0) -> Iterator[dict]:
+    rnd = random.Random(seed)
+    for update_id in range(1, updates + 1):
+        chat_id = rnd.randint(1, chats)
+        yield fake_update(update_id, chat_id, f"message {update_id} from chat {chat_id}")
+
+
+async def simulated_processor(chat_queue: ChatQueue):
+    """Stand-in for the bot: queues every update on the chat queue, like the echo handler"""
+
+    async def process(data: dict):
+        chat_queue.submit(data["message"]["chat"]["id"], data)
+
+    return process, chat_queue.drain
+
+
+async def bench(updates: int, chats: int, in_flight: int, concurrency: int, delay: float):
+    async def run_turn(chat_id: int, batch: list[dict]):
+        """Stand-in for an agent turn: takes `delay` seconds per turn"""
+        if delay:
+            await asyncio.sleep(delay)
+
+    chat_queue = ChatQueue(run_turn, max_in_flight=in_flight)
+    pool = Dispatcher(lambda: simulated_processor(chat_queue), max_queue=updates)
+    app = create_app(pool)
+    await pool.start()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def post(data: dict):
+            async with semaphore:
+                response = await client.post("/telegram", json=data)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(post(data) for data in generate(updates, chats)))
+        ingested = time.perf_counter() - start
+        # stop() waits for the dispatcher and then drains the chat queue
+        await pool.stop()
+        processed = time.perf_counter() - start
+
+    print(f"updates:   {updates} over {chats} chats, {in_flight} turns in flight")
+    print(f"ingest:    {updates / ingested:,.0f} updates/s")
+    print(f"processed: {pool.processed / processed:,.0f} updates/s (dropped {pool.dropped})")
+    print(f"turns:     {chat_queue.runs} ({updates / max(chat_queue.runs, 1):.1f} updates per turn)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=10_000)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--in-flight", type=int, default=16, help="concurrent agent turns")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent webhook requests")
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated seconds per agent turn")
+    args = parser.parse_args()
+    asyncio.run(bench(args.updates, args.chats, args.in_flight, args.concurrency, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,19 +15,50 @@ Press Ctrl-C on the command line or send a signal to the process to stop the
 bot.
 """
 
+import functools
 import os
+import sys
+from pathlib import Path
 import telegram
 from telegram.constants import ChatAction
 from telegram import ForceReply, Update
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
-from agents import Agent, Runner, SQLiteSession
+from agents import Agent, Runner
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from agentlib.compaction import CompactingSession, HistoryArchive
+from chat_queue import ChatQueue
+from session_store import SessionStore
+from streaming_reply import stream_reply
+from webhook import ALLOWED_UPDATES, Dispatcher, ShardedPool, create_app, open_application
 
 agent = Agent(
     name="Assistant",
     instructions="Reply very concisely.",
 )
 
-sessions = {}
+# Streaming replies edit a placeholder message as tokens arrive. Edits are
+# batched so we stay under Telegram's flood limits.
+STREAMING = os.environ.get("BOT_STREAMING", "1") == "1"
+EDIT_INTERVAL = float(os.environ.get("BOT_EDIT_INTERVAL", 1.0))
+EDIT_MIN_CHARS = int(os.environ.get("BOT_EDIT_MIN_CHARS", 32))
+
+# Long running chats keep their last turns verbatim and roll older ones into a
+# summary, so every turn costs about the same no matter how old the chat is
+archive = HistoryArchive("bot.sql")
+
+sessions = SessionStore(
+    "bot.sql",
+    wrap=lambda session: CompactingSession(
+        session,
+        archive=archive,
+        model=agent.model,
+        keep_turns=int(os.environ.get("BOT_KEEP_TURNS", 6)),
+        max_tokens=int(os.environ.get("BOT_HISTORY_TOKENS", 4000)),
+    ),
+    max_sessions=int(os.environ.get("BOT_MAX_SESSIONS", 1024)),
+    idle_ttl=float(os.environ.get("BOT_SESSION_IDLE_TTL", 30 * 60)),
+)
 
 # Define a few command handlers. These usually take the two arguments update and
 # context.
@@ -39,30 +70,83 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         reply_markup=ForceReply(selective=True),
     )
 
-async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Echo the user message."""
-    chat_id = update.effective_chat.id
-    session_id = f"chat_{chat_id}"
-    session = SQLiteSession(session_id, "bot.sql")
+async def run_turn(chat_id: int, updates: list[Update]) -> None:
+    """Run the agent once for all the messages that arrived since the last turn."""
+    session = sessions.get(chat_id)
+    last_message = updates[-1].message
+
+    text = "\n".join(update.message.text for update in updates)
+
+    if STREAMING:
+        result = Runner.run_streamed(agent, text, session=session)
+        await stream_reply(last_message, result, min_interval=EDIT_INTERVAL, min_chars=EDIT_MIN_CHARS)
+        return
 
-    await update.message.reply_chat_action(ChatAction.TYPING)
+    await last_message.reply_chat_action(ChatAction.TYPING)
 
     result = await Runner.run(
         agent,
-        update.message.text,
+        text,
         session=session
     )
-    await update.message.reply_text(result.final_output)
+    await last_message.reply_text(result.final_output)
 
 
-def main() -> None:
-    token = os.environ["TELEGRAM_BOT_TOKEN"]
+chat_queue = ChatQueue(run_turn, max_in_flight=int(os.environ.get("BOT_MAX_IN_FLIGHT", 16)))
+
+
+async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Queue the user message for the chat's next agent run."""
+    chat_queue.submit(update.effective_chat.id, update)
+
 
-    application = Application.builder().token(token).build()
+async def drain_chat_queue() -> None:
+    """Wait for the queued agent turns (a module function, so shard processes can pickle it)."""
+    await chat_queue.drain()
+
+
+def build_application(updater: bool = True) -> Application:
+    builder = Application.builder().token(os.environ["TELEGRAM_BOT_TOKEN"])
+    if not updater:
+        builder = builder.updater(None)
+    application = builder.build()
     application.add_handler(CommandHandler("start", start))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, echo))
+    return application
+
+
+def run_webhook() -> None:
+    """Receive updates on a webhook and dispatch them to the bot (or to bot processes)."""
+    import uvicorn
+
+    # Agent turns run on chat_queue (BOT_MAX_IN_FLIGHT at a time), drained on shutdown
+    processor_factory = functools.partial(
+        open_application,
+        functools.partial(build_application, updater=False),
+        drain=drain_chat_queue,
+    )
+    shards = int(os.environ.get("BOT_SHARDS", 1))
+    if shards > 1:
+        pool = ShardedPool(processor_factory, shards=shards)
+    else:
+        pool = Dispatcher(processor_factory)
+
+    app = create_app(
+        pool,
+        bot=telegram.Bot(os.environ["TELEGRAM_BOT_TOKEN"]),
+        webhook_url=os.environ.get("BOT_WEBHOOK_URL"),
+        secret_token=os.environ.get("BOT_WEBHOOK_SECRET"),
+    )
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8443)))
+
+
+def main() -> None:
+    if os.environ.get("BOT_MODE", "polling") == "webhook":
+        run_webhook()
+        return
 
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    application = build_application()
+    application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,301 @@
+"""
+Shared SQLite session store for the Telegram bot.
+
+Instead of building a new SQLiteSession (and opening the database file) on
+every message, the bot keeps one SessionStore for the whole process:
+
+- a small pool of SQLite connections opened once, in WAL mode
+- a bounded LRU of live ChatSession objects keyed by chat id
+- a single writer task that groups add_items calls from all chats into one
+  transaction
+- eviction of chats that were idle for longer than idle_ttl
+
+The tables are the same ones SQLiteSession uses, so an existing bot.sql keeps
+working.
+"""
+
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from agents.items import TResponseInputItem
+from agents.memory import Session, SessionABC
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS agent_sessions (
+        session_id TEXT PRIMARY KEY,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agent_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        message_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES agent_sessions (session_id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_agent_messages_session_id
+    ON agent_messages (session_id, created_at)
+    """,
+]
+
+
+class ConnectionPool:
+    """A fixed number of SQLite connections shared by all chats"""
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self._connections: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for i in range(size):
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            if i == 0:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+            self._connections.put(conn)
+
+    def run(self, fn, *args):
+        """Borrow a connection and call fn(conn, *args) in this thread"""
+        conn = self._connections.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self._connections.put(conn)
+
+    async def run_async(self, fn, *args):
+        return await asyncio.to_thread(self.run, fn, *args)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+def _load_items(conn: sqlite3.Connection, session_id: str) -> list[TResponseInputItem]:
+    rows = conn.execute(
+        "SELECT message_data FROM agent_messages WHERE session_id = ? ORDER BY created_at, id",
+        (session_id,),
+    ).fetchall()
+    items = []
+    for (message_data,) in rows:
+        try:
+            items.append(json.loads(message_data))
+        except json.JSONDecodeError:
+            continue
+    return items
+
+
+def _write_batch(conn: sqlite3.Connection, batch: list[tuple[str, list[TResponseInputItem]]]):
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO agent_sessions (session_id) VALUES (?)",
+            [(session_id,) for session_id, _ in batch],
+        )
+        conn.executemany(
+            "INSERT INTO agent_messages (session_id, message_data) VALUES (?, ?)",
+            [(session_id, json.dumps(item)) for session_id, items in batch for item in items],
+        )
+        conn.executemany(
+            "UPDATE agent_sessions SET updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
+            [(session_id,) for session_id in {session_id for session_id, _ in batch}],
+        )
+
+
+def _pop_item(conn: sqlite3.Connection, session_id: str):
+    with conn:
+        conn.execute(
+            """
+            DELETE FROM agent_messages WHERE id = (
+                SELECT id FROM agent_messages WHERE session_id = ?
+                ORDER BY created_at DESC, id DESC LIMIT 1
+            )
+            """,
+            (session_id,),
+        )
+
+
+def _replace(conn: sqlite3.Connection, session_id: str, items: list[TResponseInputItem]):
+    with conn:
+        conn.execute("DELETE FROM agent_messages WHERE session_id = ?", (session_id,))
+        conn.executemany(
+            "INSERT INTO agent_messages (session_id, message_data) VALUES (?, ?)",
+            [(session_id, json.dumps(item)) for item in items],
+        )
+
+
+def _clear(conn: sqlite3.Connection, session_id: str):
+    with conn:
+        conn.execute("DELETE FROM agent_messages WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM agent_sessions WHERE session_id = ?", (session_id,))
+
+
+class ChatSession(SessionABC):
+    """Session for a single chat, backed by the store's shared pool.
+
+    History is loaded from the database once and then kept in memory, so
+    following turns read it without touching SQLite.
+    """
+
+    def __init__(self, session_id: str, store: "SessionStore"):
+        self.session_id = session_id
+        self._store = store
+        self._items: Optional[list[TResponseInputItem]] = None
+        self._lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    async def _ensure_loaded(self) -> list[TResponseInputItem]:
+        if self._items is None:
+            async with self._lock:
+                if self._items is None:
+                    # An evicted copy of this chat may still have writes in flight
+                    await self._store.flush()
+                    self._items = await self._store.pool.run_async(_load_items, self.session_id)
+        return self._items
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        items = await self._ensure_loaded()
+        if limit is None:
+            return list(items)
+        return list(items[-limit:]) if limit > 0 else []
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        if not items:
+            return
+        cached = await self._ensure_loaded()
+        cached.extend(items)
+        await self._store.write(self.session_id, items)
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        cached = await self._ensure_loaded()
+        if not cached:
+            return None
+        await self._store.flush()
+        await self._store.pool.run_async(_pop_item, self.session_id)
+        return cached.pop()
+
+    async def clear_session(self) -> None:
+        await self._store.flush()
+        await self._store.pool.run_async(_clear, self.session_id)
+        self._items = []
+
+    async def replace_items(self, items: list[TResponseInputItem]) -> None:
+        """Swap the whole history for items in one transaction (used by compaction)"""
+        await self._store.flush()
+        await self._store.pool.run_async(_replace, self.session_id, items)
+        self._items = list(items)
+
+
+class SessionStore:
+    """Process wide store that hands out ChatSession objects by chat id"""
+
+    def __init__(
+        self,
+        db_path: str,
+        max_sessions: int = 1024,
+        idle_ttl: float = 30 * 60,
+        pool_size: int = 4,
+        batch_size: int = 256,
+        wrap: Optional[Callable[[ChatSession], Session]] = None,
+    ):
+        """wrap is applied to every new ChatSession, e.g. to add history compaction"""
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.wrap = wrap
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.batch_size = batch_size
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chat_id: int | str) -> Session:
+        session_id = f"chat_{chat_id}"
+        now = time.monotonic()
+        with self._guard:
+            session = self._sessions.get(session_id)
+            if session is None:
+                self.misses += 1
+                session = ChatSession(session_id, self)
+                if self.wrap is not None:
+                    session = self.wrap(session)
+                self._sessions[session_id] = session
+            else:
+                self.hits += 1
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._evict(now)
+        return session
+
+    def _evict(self, now: float):
+        # Oldest entries are at the front, so we can stop at the first live one
+        skipped = 0
+        while self._sessions and skipped < len(self._sessions):
+            session_id, session = next(iter(self._sessions.items()))
+            too_many = len(self._sessions) > self.max_sessions
+            idle = now - session.last_used > self.idle_ttl
+            if not (too_many or idle):
+                break
+            if getattr(session, "busy", False):
+                # A background compaction still writes through this wrapper. A new
+                # wrapper for the same chat would race it, so keep it until it's done
+                self._sessions.move_to_end(session_id)
+                skipped += 1
+                continue
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    async def write(self, session_id: str, items: list[TResponseInputItem]):
+        """Queue items for the writer task and wait until they are committed"""
+        if self._writer is None or self._writer.done():
+            self._writes = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_loop())
+        done = asyncio.get_running_loop().create_future()
+        await self._writes.put((session_id, list(items), done))
+        await done
+
+    async def flush(self):
+        if self._writes is not None:
+            await self._writes.join()
+
+    async def _write_loop(self):
+        while True:
+            entries = [await self._writes.get()]
+            while len(entries) < self.batch_size and not self._writes.empty():
+                entries.append(self._writes.get_nowait())
+            try:
+                await self.pool.run_async(_write_batch, [(sid, items) for sid, items, _ in entries])
+            except Exception as e:
+                for _, _, done in entries:
+                    if not done.done():
+                        done.set_exception(e)
+            else:
+                for _, _, done in entries:
+                    if not done.done():
+                        done.set_result(None)
+            finally:
+                for _ in entries:
+                    self._writes.task_done()
+
+    async def close(self):
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+        self.pool.close()
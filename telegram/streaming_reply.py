@@ -0,0 +1,141 @@
+"""
+Stream an agent reply into a Telegram message.
+
+A placeholder message is sent as soon as the run starts and is then edited
+with the text deltas as they arrive. Telegram rate limits message edits, so
+deltas are batched: an edit is only sent when at least min_interval seconds
+passed since the previous one and at least min_chars new characters
+arrived. Whatever is left is flushed when the run ends. If the run fails,
+or ends without any text (only tool calls, or an empty output), the
+placeholder is replaced with a short note instead of being left behind.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+from openai.types.responses import ResponseTextDeltaEvent
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+from agents import RunResultStreaming
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+PLACEHOLDER = "…"
+ERROR_TEXT = "Sorry, something went wrong while answering."
+EMPTY_TEXT = "(no text reply)"
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class StreamingReply:
+    def __init__(self, reply_to: Message, min_interval: float = 1.0, min_chars: int = 32):
+        self.reply_to = reply_to
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.text = ""
+        self.edits = 0
+        self.first_token_at: float | None = None
+        self._message: Message | None = None
+        # Offset in self.text where the current Telegram message starts
+        self._message_start = 0
+        self._sent_length = 0
+        self._last_edit = 0.0
+
+    async def start(self):
+        self._message = await self.reply_to.reply_text(PLACEHOLDER)
+        self._last_edit = time.monotonic()
+
+    async def add(self, delta: str):
+        if not delta:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.text += delta
+        now = time.monotonic()
+        if now - self._last_edit < self.min_interval:
+            return
+        if len(self.text) - self._sent_length < self.min_chars:
+            return
+        await self._flush(final=False)
+
+    async def finish(self, final_text: str | None = None):
+        # Models that don't stream text deltas only give us the final output
+        if not self.text and final_text:
+            self.text = final_text
+        if not self.text.strip():
+            await self._edit(EMPTY_TEXT, final=True)
+            return
+        await self._flush(final=True)
+
+    async def fail(self, note: str = ERROR_TEXT):
+        """Show that the run failed: replace a bare placeholder, or append to partial text"""
+        if self._message is None:
+            return
+        shown = self.text[self._message_start:self._sent_length]
+        text = f"{shown}\n\n{note}" if shown else note
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[-MAX_MESSAGE_LENGTH:]
+        try:
+            await self._message.edit_text(text)
+        except TelegramError:
+            # Best effort, the original error is what matters
+            pass
+
+    async def _flush(self, final: bool):
+        # Start a new message once the current one is full
+        while len(self.text) - self._message_start > MAX_MESSAGE_LENGTH:
+            end = self._message_start + MAX_MESSAGE_LENGTH
+            await self._edit(self.text[self._message_start:end], final=True)
+            self._message = await self.reply_to.reply_text(PLACEHOLDER)
+            self._message_start = end
+
+        chunk = self.text[self._message_start:]
+        if chunk and len(self.text) != self._sent_length:
+            if await self._edit(chunk, final=final):
+                self._sent_length = len(self.text)
+
+    async def _edit(self, chunk: str, final: bool) -> bool:
+        while True:
+            try:
+                await self._message.edit_text(chunk)
+                self.edits += 1
+                break
+            except RetryAfter as e:
+                if not final:
+                    # Skip this edit, the next delta or finish() will catch up
+                    self._last_edit = time.monotonic() + _retry_seconds(e)
+                    return False
+                await asyncio.sleep(_retry_seconds(e))
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    break
+                raise
+        self._last_edit = time.monotonic()
+        return True
+
+
+async def stream_reply(
+    reply_to: Message,
+    result: RunResultStreaming,
+    min_interval: float = 1.0,
+    min_chars: int = 32,
+) -> StreamingReply:
+    """Consume result.stream_events() and mirror the text into a Telegram message"""
+    reply = StreamingReply(reply_to, min_interval=min_interval, min_chars=min_chars)
+    await reply.start()
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                await reply.add(event.data.delta)
+        final_output = result.final_output
+        await reply.finish(final_output if isinstance(final_output, str) else None)
+    except BaseException:
+        await asyncio.shield(reply.fail())
+        raise
+    return reply
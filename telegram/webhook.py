@@ -0,0 +1,200 @@
+"""
+Webhook ingestion for the Telegram bot.
+
+Telegram POSTs updates to a FastAPI endpoint. The endpoint only checks the
+secret token, drops update types we don't handle and hands the raw JSON to a
+dispatcher, so it can answer Telegram immediately.
+
+Two dispatchers are available:
+
+- Dispatcher: feeds updates, in order, to the Application of this process
+- ShardedPool: several processes, each running its own Dispatcher
+
+Handling an update only queues it on the bot's ChatQueue, which runs the
+agent turns: that is where concurrency is bounded (BOT_MAX_IN_FLIGHT), not
+here. ShardedPool shards updates by chat id, so the per chat state (session
+cache, chat queue) lives in exactly one process. Stopping a dispatcher waits
+for the queued updates and then for the turns they started (the processor's
+close function drains the chat queue).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import FastAPI, Request, Response
+from telegram import Bot, Update
+
+logger = logging.getLogger(__name__)
+
+# The only update types the bot has handlers for
+ALLOWED_UPDATES = [Update.MESSAGE]
+
+Process = Callable[[dict], Awaitable[None]]
+# Returns the function that handles one update, and a function that cleans up
+ProcessorFactory = Callable[[], Awaitable[tuple[Process, Callable[[], Awaitable[None]]]]]
+
+
+def chat_id_of(data: dict) -> int:
+    for key in ALLOWED_UPDATES:
+        payload = data.get(key)
+        if payload and "chat" in payload:
+            return payload["chat"]["id"]
+    return 0
+
+
+async def open_application(
+    build_application,
+    drain: Optional[Callable[[], Awaitable[None]]] = None,
+) -> tuple[Process, Callable[[], Awaitable[None]]]:
+    """
+    Processor factory that runs updates through a python-telegram-bot Application.
+    drain waits for the work the handlers started (the chat queue's turns), it
+    runs before the Application shuts down.
+    """
+    application = build_application()
+    await application.initialize()
+
+    async def process(data: dict):
+        await application.process_update(Update.de_json(data, application.bot))
+
+    async def close():
+        if drain is not None:
+            await drain()
+        await application.shutdown()
+
+    return process, close
+
+
+class Dispatcher:
+    def __init__(self, processor_factory: ProcessorFactory, max_queue: int = 10_000):
+        self.processor_factory = processor_factory
+        self.max_queue = max_queue
+        self.processed = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._close: Optional[Callable[[], Awaitable[None]]] = None
+
+    async def start(self):
+        process, self._close = await self.processor_factory()
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._work(process))
+
+    async def _work(self, process: Process):
+        while True:
+            data = await self._queue.get()
+            try:
+                await process(data)
+                self.processed += 1
+            except Exception:
+                logger.exception("Failed to process update %s", data.get("update_id"))
+            finally:
+                self._queue.task_done()
+
+    def submit(self, data: dict):
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Telegram will not resend it, but blocking the webhook would
+            # stall every other chat too
+            self.dropped += 1
+            logger.warning("Update queue full, dropping update %s", data.get("update_id"))
+
+    async def join(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        await self.join()
+        if self._task is not None:
+            self._task.cancel()
+        if self._close is not None:
+            await self._close()
+
+
+def _run_shard(processor_factory: ProcessorFactory, queue: multiprocessing.Queue):
+    async def run():
+        pool = Dispatcher(processor_factory)
+        await pool.start()
+        while True:
+            data = await asyncio.to_thread(queue.get)
+            if data is None:
+                break
+            pool.submit(data)
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+class ShardedPool:
+    def __init__(self, processor_factory: ProcessorFactory, shards: int = 2):
+        self.processor_factory = processor_factory
+        self.shards = shards
+        self._queues: list[multiprocessing.Queue] = []
+        self._processes: list[multiprocessing.Process] = []
+
+    async def start(self):
+        # spawn, not fork: each shard must open its own SQLite connections
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.shards):
+            queue = context.Queue()
+            process = context.Process(
+                target=_run_shard,
+                args=(self.processor_factory, queue),
+                daemon=True,
+            )
+            process.start()
+            self._queues.append(queue)
+            self._processes.append(process)
+
+    def submit(self, data: dict):
+        self._queues[chat_id_of(data) % self.shards].put(data)
+
+    async def stop(self):
+        for queue in self._queues:
+            queue.put(None)
+        for process in self._processes:
+            await asyncio.to_thread(process.join)
+
+
+def create_app(
+    pool: Any,
+    path: str = "/telegram",
+    bot: Optional[Bot] = None,
+    webhook_url: Optional[str] = None,
+    secret_token: Optional[str] = None,
+) -> FastAPI:
+    """Build the ASGI app. pool is a Dispatcher or a ShardedPool."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await pool.start()
+        if bot is not None and webhook_url:
+            await bot.initialize()
+            await bot.set_webhook(
+                webhook_url + path,
+                allowed_updates=ALLOWED_UPDATES,
+                secret_token=secret_token,
+                drop_pending_updates=False,
+            )
+        yield
+        await pool.stop()
+        if bot is not None and webhook_url:
+            await bot.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.pool = pool
+
+    @app.post(path)
+    async def receive_update(request: Request):
+        if secret_token and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token:
+            return Response(status_code=403)
+        data = await request.json()
+        if any(key in data for key in ALLOWED_UPDATES):
+            pool.submit(data)
+        return Response(status_code=200)
+
+    return app
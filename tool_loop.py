@@ -1,7 +1,11 @@
 import asyncio
 from agents import Agent, Runner, function_tool
 
+from agentlib.tool_cache import cache_stats, memoize
+from agentlib.tool_exec import pooled
+
 @function_tool()
+@pooled(timeout=5)
 def create_empty_file(filename: str):
     """
     Creates a new empty file
@@ -10,6 +14,8 @@ def create_empty_file(filename: str):
     print("Tool Call: create_empty_file")
 
 @function_tool()
+@memoize(ttl=60, paths=lambda args: [args["filename"]])
+@pooled(timeout=5)
 def check_file_exists(filename: str) -> bool:
     """
     Check if a file exists
@@ -29,6 +35,7 @@ async def main():
     result = await Runner.run(agent, "Create an empty file named test.txt")
     print(result.to_input_list())
     print(result.final_output)
+    print(cache_stats())
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file